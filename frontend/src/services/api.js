@@ -51,27 +51,67 @@ export const getSkills = async (grouped = true) => {
 };
 
 // Analytics API
-export const trackPageView = async (page) => {
-  try {
-    await api.post('/analytics/track', {
-      type: 'page_view',
-      page
-    });
-  } catch (error) {
-    console.error('Failed to track page view:', error);
+// Events are queued and sent together to the batch endpoint. The body is sent
+// as text/plain so navigator.sendBeacon can deliver it without a CORS preflight.
+const ANALYTICS_FLUSH_MS = 2000;
+const ANALYTICS_MAX_BATCH = 20;
+let analyticsQueue = [];
+let analyticsTimer = null;
+
+const flushAnalytics = () => {
+  if (analyticsTimer) {
+    clearTimeout(analyticsTimer);
+    analyticsTimer = null;
+  }
+  if (analyticsQueue.length === 0) {
+    return;
   }
+
+  const body = JSON.stringify({ events: analyticsQueue });
+  analyticsQueue = [];
+
+  if (navigator.sendBeacon && navigator.sendBeacon(`${API_BASE_URL}/analytics/track/batch`, body)) {
+    return;
+  }
+
+  api.post('/analytics/track/batch', body, {
+    headers: { 'Content-Type': 'text/plain' }
+  }).catch((error) => {
+    console.error('Failed to send analytics events:', error);
+  });
 };
 
-export const trackProjectClick = async (projectId, projectTitle) => {
-  try {
-    await api.post('/analytics/track', {
-      type: 'project_click',
-      project_id: projectId,
-      project_title: projectTitle
-    });
-  } catch (error) {
-    console.error('Failed to track project click:', error);
+const queueAnalyticsEvent = (event) => {
+  analyticsQueue.push(event);
+  if (analyticsQueue.length >= ANALYTICS_MAX_BATCH) {
+    flushAnalytics();
+  } else if (!analyticsTimer) {
+    analyticsTimer = setTimeout(flushAnalytics, ANALYTICS_FLUSH_MS);
   }
 };
 
+if (typeof window !== 'undefined') {
+  window.addEventListener('pagehide', flushAnalytics);
+  document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') {
+      flushAnalytics();
+    }
+  });
+}
+
+export const trackPageView = async (page) => {
+  queueAnalyticsEvent({
+    type: 'page_view',
+    page
+  });
+};
+
+export const trackProjectClick = async (projectId, projectTitle) => {
+  queueAnalyticsEvent({
+    type: 'project_click',
+    project_id: projectId,
+    project_title: projectTitle
+  });
+};
+
 export default api;
\ No newline at end of file
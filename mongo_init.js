@@ -19,13 +19,16 @@ db.skills.createIndex({ "category": 1 });
 db.skills.createIndex({ "proficiency": 1 });
 db.skills.createIndex({ "name": 1 }, { unique: true });
 
-db.contacts.createIndex({ "created_at": -1 });
-db.contacts.createIndex({ "read": 1 });
+db.contacts.createIndex({ "created_at": -1, "_id": -1 });
+db.contacts.createIndex({ "read": 1, "created_at": -1, "_id": -1 });
 db.contacts.createIndex({ "email": 1 });
 
-db.analytics.createIndex({ "timestamp": -1 });
-db.analytics.createIndex({ "type": 1 });
-db.analytics.createIndex({ "type": 1, "timestamp": -1 });
+db.outbox.createIndex({ "status": 1, "next_attempt_at": 1 });
+
+db.analytics.createIndex({ "timestamp": -1, "_id": -1 });
+db.analytics.createIndex({ "type": 1, "timestamp": -1, "_id": -1 });
+db.analytics.createIndex({ "page": 1, "timestamp": -1, "_id": -1 }, { sparse: true });
+db.analytics.createIndex({ "project_id": 1, "timestamp": -1, "_id": -1 }, { sparse: true });
 
 db.admins.createIndex({ "username": 1 }, { unique: true });
 
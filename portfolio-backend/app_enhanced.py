@@ -3,32 +3,50 @@ Enhanced Flask application with security, logging, and performance improvements
 """
 
 from flask import Flask, jsonify, request
+import click
 from flask_cors import CORS
 from flask_mail import Mail
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config.config import Config
 from utils.logger import setup_logging, RequestLogger
 from utils.database_optimized import db_manager
+from utils.cache import cache_manager, render_metrics
+from utils.analytics_buffer import analytics_buffer
+from utils.sampling import analytics_sampler
+from utils.outbox import email_outbox
+from utils.json_provider import FastJSONProvider
+from utils.compression import compress_response
+from utils.http_cache import seed_stamps
+from utils.counters import UNREAD_CONTACTS, count_unread_contacts, get_counter, reset_counter, seed_counter
 import logging
+import threading
 
 # Import routes
 from routes.contact import contact_bp
-from routes.projects import project_bp
-from routes.skills import skill_bp
+from routes.projects import project_bp, CACHE_TAG as project_cache_tag
+from routes.skills import skill_bp, CACHE_TAG as skill_cache_tag
 from routes.analytics import analytics_bp
 from routes.auth import auth_bp
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = FastJSONProvider(app)
+
+# Client address from the proxy's X-Forwarded-For, for rate limits and
+# analytics; headers from anyone else are ignored
+if Config.TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.TRUSTED_PROXIES, x_proto=Config.TRUSTED_PROXIES)
 
 # Setup logging
 logger = setup_logging(app)
 request_logger = RequestLogger(app)
 
-# Initialize Flask-Mail
+# Initialize Flask-Mail and background email delivery
 mail = Mail(app)
+email_outbox.init_app(app, mail)
 
 # Initialize rate limiter
 limiter = Limiter(
@@ -74,6 +92,9 @@ def after_request(response):
     response.headers['X-XSS-Protection'] = '1; mode=block'
     response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
 
+    # Compress eligible bodies (cached responses arrive precompressed)
+    response = compress_response(response)
+
     # Log response
     request_logger.log_response(response)
 
@@ -92,6 +113,9 @@ def health_check():
         return jsonify({
             "status": "healthy",
             "database": db_status,
+            "analytics_buffer": analytics_buffer.stats(),
+            "analytics_sampling": analytics_sampler.stats(),
+            "email_outbox": email_outbox.stats(),
             "message": "Portfolio API is running",
             "version": "1.0.0"
         }), 200
@@ -103,6 +127,18 @@ def health_check():
         }), 503
 
 
+# Metrics endpoint
+@app.route('/metrics', methods=['GET'])
+@limiter.exempt
+def metrics():
+    """Cache and analytics buffer counters in Prometheus text format"""
+    body = (
+        render_metrics(cache_manager.stats(), "portfolio_cache")
+        + render_metrics(analytics_buffer.stats(), "portfolio_analytics_buffer")
+    )
+    return body, 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+
 # Root endpoint
 @app.route('/', methods=['GET'])
 @limiter.limit("10 per minute")
@@ -113,6 +149,7 @@ def root():
         "version": "1.0.0",
         "documentation": "/api/docs",
         "health": "/health",
+        "metrics": "/metrics",
         "endpoints": {
             "auth": "/api/auth",
             "contact": "/api/contact",
@@ -130,7 +167,7 @@ try:
     logger.info("Auth routes registered")
 
 
-    # Contact routes with mail dependency
+    # Contact routes (emails go through the outbox)
     @app.route('/api/contact', methods=['POST'])
     @limiter.limit("5 per hour")  # Strict limit for contact form
     def handle_contact():
@@ -150,7 +187,7 @@ try:
             validated_data['message'] = sanitize_input(validated_data['message'])
 
             request.validated_data = validated_data
-            return submit_contact(mail)
+            return submit_contact()
         except ValidationError as err:
             return jsonify({"errors": err.messages}), 400
 
@@ -167,6 +204,42 @@ try:
         return get_contacts_admin()
 
 
+    @app.route('/api/contacts/export', methods=['GET'])
+    def handle_export_contacts():
+        from routes.contact import export_contacts
+        from utils.auth import admin_required
+
+        @admin_required
+        def export_contacts_admin(user_id):
+            return export_contacts()
+
+        return export_contacts_admin()
+
+
+    @app.route('/api/contacts/unread_count', methods=['GET'])
+    def handle_unread_count():
+        from routes.contact import get_unread_count
+        from utils.auth import admin_required
+
+        @admin_required
+        def unread_count_admin(user_id):
+            return get_unread_count()
+
+        return unread_count_admin()
+
+
+    @app.route('/api/contacts/read', methods=['PATCH'])
+    def handle_mark_many_read():
+        from routes.contact import mark_contacts_read
+        from utils.auth import admin_required
+
+        @admin_required
+        def mark_many_read_admin(user_id):
+            return mark_contacts_read()
+
+        return mark_many_read_admin()
+
+
     @app.route('/api/contacts/<contact_id>/read', methods=['PATCH'])
     def handle_mark_read(contact_id):
         from routes.contact import mark_contact_read
@@ -191,6 +264,35 @@ except Exception as e:
     raise
 
 
+# Catalog version stamps must exist before GETs read them
+try:
+    seed_stamps((project_cache_tag, skill_cache_tag))
+except Exception as e:
+    logger.warning(f"Could not seed catalog version stamps, conditional GETs are disabled until the first write: {e}")
+
+# Seed denormalized counters before this worker serves requests
+try:
+    seed_counter(UNREAD_CONTACTS, count_unread_contacts)
+except Exception as e:
+    logger.warning(f"Could not seed counters, they will be seeded on first read: {e}")
+
+
+# Pre-warm public read caches (gunicorn imports the app once per worker)
+def warm_caches():
+    from routes.projects import warm_cache as warm_projects
+    from routes.skills import warm_cache as warm_skills
+
+    try:
+        warm_projects()
+        warm_skills()
+        logger.info("Public read caches warmed")
+    except Exception as e:
+        logger.warning(f"Cache warm-up failed, caches will fill on first request: {e}")
+
+
+threading.Thread(target=warm_caches, name="cache-warmup", daemon=True).start()
+
+
 # Error handlers with logging
 @app.errorhandler(400)
 def bad_request(error):
@@ -276,6 +378,74 @@ def init_database():
         print(f"Failed to initialize database: {e}")
 
 
+# Recount denormalized counters CLI command
+@app.cli.command('reconcile-counters')
+def reconcile_counters_command():
+    """Overwrite denormalized counters with fresh counts"""
+    try:
+        actual = count_unread_contacts()
+        previous = get_counter(UNREAD_CONTACTS, lambda: actual)
+        reset_counter(UNREAD_CONTACTS, actual)
+        print(f"{UNREAD_CONTACTS}: {previous} -> {actual}")
+    except Exception as e:
+        print(f"Failed to reconcile counters: {e}")
+
+
+# Build analytics rollups from raw events CLI command
+@app.cli.command('backfill-rollups')
+def backfill_rollups_command():
+    """Rebuild hourly analytics rollups from raw events"""
+    from utils.analytics_rollup import backfill_rollups
+
+    try:
+        written = backfill_rollups()
+        print(f"Backfilled {written} rollup buckets")
+    except Exception as e:
+        print(f"Failed to backfill rollups: {e}")
+
+
+# Migrate analytics into a time-series collection CLI command
+@app.cli.command('migrate-analytics')
+@click.option('--source', default='analytics', help='Plain collection to copy from')
+@click.option('--target', default='analytics_ts', help='Time-series collection to copy into')
+@click.option('--chunk-size', default=5000, help='Documents per insert_many')
+@click.option('--overlap-minutes', default=60, help='How far before the checkpoint a re-run resumes')
+@click.option('--full', is_flag=True, help='Rescan every event (already copied ones are skipped)')
+def migrate_analytics_command(source, target, chunk_size, overlap_minutes, full):
+    """
+    Copy analytics events into a time-series collection without downtime
+    1. Run this while the app keeps writing to the source collection.
+    2. Set ANALYTICS_COLLECTION=<target> and ANALYTICS_TIMESERIES=True, restart.
+    3. Run it again with --full to copy anything written before the restart,
+       including late events replayed from worker spools.
+    """
+    from utils.analytics_migration import copy_analytics_chunks, time_dashboard_query
+
+    def report(name):
+        stats = db_manager.collection_stats(name)
+        elapsed = time_dashboard_query(name, timeseries=name == target)
+        print(f"  {name:<20} docs={stats['count']:<10} storage={stats['storage_size']:<12} "
+              f"indexes={stats['index_size']:<12} dashboard={elapsed:.1f}ms")
+
+    try:
+        print("Before:")
+        report(source)
+        copied = copy_analytics_chunks(
+            source,
+            target,
+            chunk_size=chunk_size,
+            overlap_minutes=overlap_minutes,
+            full=full,
+            progress=lambda n: print(f"  copied {n} events", end="\r")
+        )
+        print(f"\nCopied {copied} events into '{target}'")
+        print("After:")
+        report(source)
+        report(target)
+    except Exception as e:
+        print(f"Failed to migrate analytics: {e}")
+
+
 if __name__ == '__main__':
     print("\n" + "=" * 50)
     print("🚀 Starting Enhanced Portfolio Backend API")
@@ -0,0 +1,27 @@
+"""
+Database selection for benchmarks
+
+Benchmarks run against MONGODB_URI. When it is unset they fall back to an
+in-memory mongomock server, which is enough for CPU-bound measurements but
+says nothing about query performance. Call use_database() before importing
+any app module (utils.database_optimized connects on import).
+"""
+
+import os
+
+
+def use_database():
+    """
+    Returns:
+        str: "mongodb" or "mongomock"
+    """
+    if os.getenv('MONGODB_URI'):
+        return "mongodb"
+
+    import mongomock
+    import pymongo
+
+    client = mongomock.MongoClient()
+    pymongo.MongoClient = lambda *args, **kwargs: client
+    os.environ['MONGODB_URI'] = 'mongodb://localhost'
+    return "mongomock"
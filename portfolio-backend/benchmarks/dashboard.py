@@ -0,0 +1,138 @@
+"""
+Dashboard aggregation: one query per statistic vs a single $facet pass
+
+Seeds a dedicated collection with synthetic events (90% page views spread
+over --days days, 10% project clicks), indexes it like the analytics
+collection, and reports best-of-N wall time for
+  - the per-statistic queries the dashboard used before (reproduced below),
+  - _dashboard_from_raw(), the single $facet aggregation,
+  - a cache hit on the same computation.
+Run it against a real server; with mongomock the times measure Python, not
+MongoDB.
+
+    cd portfolio-backend && MONGODB_URI=mongodb://localhost:27017 \\
+        python -m benchmarks.dashboard --events 1000000
+"""
+
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks._db import use_database
+
+os.environ.setdefault('CACHE_BUS', 'none')
+os.environ.setdefault('CACHE_L2_BACKEND', 'none')
+
+BENCH_COLLECTION = 'analytics_bench'
+
+
+def legacy_dashboard(collection, start_date):
+    """The dashboard before the $facet change: six separate round trips"""
+    page_view_match = {"$match": {"type": "page_view", "timestamp": {"$gte": start_date}}}
+    total_page_views = collection.count_documents({"type": "page_view", "timestamp": {"$gte": start_date}})
+    page_views = list(collection.aggregate([
+        page_view_match,
+        {"$group": {"_id": "$page", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}}
+    ]))
+    total_project_clicks = collection.count_documents({"type": "project_click", "timestamp": {"$gte": start_date}})
+    popular_projects = list(collection.aggregate([
+        {"$match": {"type": "project_click", "timestamp": {"$gte": start_date}}},
+        {"$group": {"_id": "$project_id", "title": {"$first": "$project_title"}, "clicks": {"$sum": 1}}},
+        {"$sort": {"clicks": -1}},
+        {"$limit": 10}
+    ]))
+    daily_views = list(collection.aggregate([
+        {"$match": {"type": "page_view", "timestamp": {"$gte": datetime.utcnow() - timedelta(days=7)}}},
+        {"$group": {
+            "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+            "views": {"$sum": 1}
+        }},
+        {"$sort": {"_id": 1}}
+    ]))
+    unique_visitors = list(collection.aggregate([
+        page_view_match,
+        {"$group": {"_id": "$user_agent"}},
+        {"$count": "total"}
+    ]))
+    return total_page_views, page_views, total_project_clicks, popular_projects, daily_views, unique_visitors
+
+
+def seed(collection, events, days, batch_size=10000):
+    from pymongo import ASCENDING, DESCENDING
+
+    collection.drop()
+    now = datetime.utcnow()
+    pages = [f"/page-{i}" for i in range(50)]
+    projects = [(f"project-{i}", f"Project {i}") for i in range(20)]
+    seconds = days * 86400
+    written = 0
+    while written < events:
+        batch = []
+        for _ in range(min(batch_size, events - written)):
+            timestamp = now - timedelta(seconds=random.randrange(seconds))
+            if random.random() < 0.9:
+                batch.append({
+                    "type": "page_view", "page": random.choice(pages), "referrer": None,
+                    "user_agent": f"agent-{random.randrange(5000)}", "weight": 1.0, "timestamp": timestamp
+                })
+            else:
+                project_id, title = random.choice(projects)
+                batch.append({
+                    "type": "project_click", "project_id": project_id,
+                    "project_title": title, "timestamp": timestamp
+                })
+        collection.insert_many(batch, ordered=False)
+        written += len(batch)
+
+    # Same indexes as DatabaseManager.create_indexes() gives the analytics collection
+    collection.create_index([('timestamp', DESCENDING), ('_id', DESCENDING)])
+    collection.create_index([('type', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)])
+
+
+def _best_ms(func, runs):
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(events, days, window, runs, reuse):
+    print(f"database: {use_database()}")
+    from routes.analytics import _dashboard_from_raw
+    from utils.cache import cached
+    from utils.database_optimized import db_manager
+
+    collection = db_manager.get_collection(BENCH_COLLECTION)
+    if not reuse or collection.estimated_document_count() != events:
+        started = time.perf_counter()
+        seed(collection, events, days)
+        print(f"seeded {events} events over {days} days in {time.perf_counter() - started:.1f}s")
+
+    start_date = datetime.utcnow() - timedelta(days=window)
+
+    @cached(ttl_seconds=3600)
+    def cached_dashboard(window):
+        return _dashboard_from_raw(start_date, collection)
+
+    cached_dashboard(window)
+    print(f"{window}-day window, best of {runs} (ms)")
+    print(f"  per-statistic queries {_best_ms(lambda: legacy_dashboard(collection, start_date), runs):10.1f}")
+    print(f"  single $facet         {_best_ms(lambda: _dashboard_from_raw(start_date, collection), runs):10.1f}")
+    print(f"  cache hit             {_best_ms(lambda: cached_dashboard(window), runs):10.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=1000000)
+    parser.add_argument('--days', type=int, default=90, help="spread of the seeded events")
+    parser.add_argument('--window', type=int, default=30, help="dashboard ?days=")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--reuse', action='store_true', help="keep an already seeded collection")
+    args = parser.parse_args()
+    run(args.events, args.days, args.window, args.runs, args.reuse)
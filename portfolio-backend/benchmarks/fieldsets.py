@@ -0,0 +1,48 @@
+"""
+Response size and encoding time for full vs sparse list representations
+
+Serializes N projects and events with the full representation, the summary
+view and a two-field fieldset, and reports the JSON size (raw and gzipped)
+and serialize + encode time for each.
+
+    cd portfolio-backend && python -m benchmarks.fieldsets --docs 100
+"""
+
+import argparse
+import gzip
+import timeit
+
+from benchmarks.serializers import _documents
+from models.models import AnalyticsModel, ProjectModel
+from utils.fieldsets import many_serializer
+from utils.json_provider import dumps_bytes
+
+CASES = {
+    "projects": (ProjectModel, ("id", "title")),
+    "events": (AnalyticsModel, ("id", "type"))
+}
+
+
+def _best_ms(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def run(n, repeat):
+    documents = _documents(n)
+    print(f"{n} documents, best of {repeat}")
+    print(f"{'':10} {'fields':>16} {'KB':>8} {'KB gzip':>8} {'ms':>7}")
+    for name, (model, pair) in CASES.items():
+        docs = documents[name]
+        for label, fields in (("full", None), ("view=summary", model.VIEWS["summary"]), ("+".join(pair), pair)):
+            serialize_many = many_serializer(model, fields)
+            body = dumps_bytes(serialize_many(docs))
+            elapsed = _best_ms(lambda: dumps_bytes(serialize_many(docs)), repeat)
+            print(f"{name:10} {label:>16} {len(body) / 1024:8.1f} {len(gzip.compress(body)) / 1024:8.1f} {elapsed:7.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    run(args.docs, args.repeat)
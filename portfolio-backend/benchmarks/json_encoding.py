@@ -0,0 +1,60 @@
+"""
+JSON encoding of list responses: Flask's default provider vs FastJSONProvider
+
+Encodes N serialized events and contacts three ways:
+  - flask default: the previous setup, serializers converting ids and dates
+    themselves and Flask's DefaultJSONProvider encoding the result,
+  - stdlib: FastJSONProvider's fallback when orjson is not installed,
+  - orjson: FastJSONProvider with orjson.
+
+    cd portfolio-backend && python -m benchmarks.json_encoding --docs 500
+"""
+
+import argparse
+import json
+import timeit
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.serializers import _documents, legacy_contact, legacy_event
+from models.models import AnalyticsModel, ContactModel
+from utils import json_provider
+
+
+def stdlib_dumps_bytes(obj):
+    """json_provider's encoder when orjson is missing"""
+    return json.dumps(obj, default=json_provider._default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _best_ms(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def run(n, repeat):
+    if json_provider.orjson is None:
+        print("orjson is not installed; the orjson column repeats the stdlib fallback")
+    flask_default = DefaultJSONProvider(Flask(__name__))
+    documents = _documents(n)
+    cases = {
+        "events": (legacy_event, AnalyticsModel, documents["events"]),
+        "contacts": (legacy_contact, ContactModel, documents["contacts"])
+    }
+
+    print(f"{n} documents, serialize + encode, best of {repeat} (ms)")
+    print(f"{'':10} {'flask default':>14} {'stdlib':>8} {'orjson':>8}")
+    for name, (legacy, model, docs) in cases.items():
+        timings = (
+            _best_ms(lambda: flask_default.dumps([legacy(doc) for doc in docs]).encode('utf-8'), repeat),
+            _best_ms(lambda: stdlib_dumps_bytes(model.serialize_many(docs)), repeat),
+            _best_ms(lambda: json_provider.dumps_bytes(model.serialize_many(docs)), repeat)
+        )
+        print(f"{name:10} {timings[0]:14.2f} {timings[1]:8.2f} {timings[2]:8.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    run(args.docs, args.repeat)
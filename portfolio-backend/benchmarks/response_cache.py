@@ -0,0 +1,81 @@
+"""
+CPU cost of a catalog GET with and without the encoded response cache
+
+Both routes return the same already-serialized project list (as a warm
+list_projects() cache would); one is wrapped in cached_response(), so hits
+skip jsonify and compression. Requests go through the app's JSON provider
+and compression hook with a gzip-accepting client.
+
+    cd portfolio-backend && python -m benchmarks.response_cache --requests 2000
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime
+
+from benchmarks._db import use_database
+
+os.environ.setdefault('CACHE_BUS', 'none')
+os.environ.setdefault('CACHE_L2_BACKEND', 'none')
+
+
+def _projects(n):
+    from bson import ObjectId
+
+    return [
+        {"id": ObjectId(), "title": f"Project {i}", "description": "A portfolio project. " * 8,
+         "tech_stack": ["React", "Flask", "MongoDB"], "github_link": "https://github.com/x/y",
+         "live_link": None, "image_url": "https://example.com/i.png", "order": i,
+         "created_at": datetime.utcnow()}
+        for i in range(n)
+    ]
+
+
+def _app(items):
+    from flask import Flask, jsonify
+
+    from utils.compression import compress_response
+    from utils.http_cache import cached_response
+    from utils.json_provider import FastJSONProvider
+
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.after_request(compress_response)
+
+    def view():
+        return jsonify({"projects": items})
+
+    app.add_url_rule('/uncached', 'uncached', view)
+    app.add_url_rule('/cached', 'cached', cached_response('bench_projects')(view))
+    return app
+
+
+def _cpu_ms_per_request(client, path, requests):
+    client.get(path, headers={"Accept-Encoding": "gzip"})  # warm up / fill the cache
+    started = time.process_time()
+    for _ in range(requests):
+        client.get(path, headers={"Accept-Encoding": "gzip"})
+    return (time.process_time() - started) * 1000 / requests
+
+
+def run(sizes, requests):
+    print(f"database: {use_database()}")
+    from utils.http_cache import seed_stamps
+
+    seed_stamps(('bench_projects',))
+    print(f"CPU ms per request, {requests} requests, Accept-Encoding: gzip")
+    print(f"{'items':>6} {'uncached':>9} {'cached':>9} {'saved':>7}")
+    for n in sizes:
+        client = _app(_projects(n)).test_client()
+        uncached = _cpu_ms_per_request(client, '/uncached', requests)
+        cached = _cpu_ms_per_request(client, '/cached', requests)
+        print(f"{n:6} {uncached:9.3f} {cached:9.3f} {1 - cached / uncached:7.0%}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+    run(args.sizes, args.requests)
@@ -0,0 +1,128 @@
+"""
+Model serializer microbenchmark over synthetic documents
+
+Times serialize_many() for each model, alone and followed by the app's JSON
+encoding, against the per-document serializers the models used before the
+schema-driven ones (reproduced below), which converted ids and dates
+themselves and copied every key of an event.
+
+    cd portfolio-backend && python -m benchmarks.serializers --docs 10000
+"""
+
+import argparse
+import timeit
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from models.models import AnalyticsModel, ContactModel, ProjectModel, SkillModel
+from utils.json_provider import dumps_bytes
+
+
+def legacy_contact(contact):
+    return {
+        "id": str(contact["_id"]),
+        "name": contact["name"],
+        "email": contact["email"],
+        "message": contact["message"],
+        "read": contact.get("read", False),
+        "created_at": contact["created_at"].isoformat()
+    }
+
+
+def legacy_project(project):
+    return {
+        "id": str(project["_id"]),
+        "title": project["title"],
+        "description": project["description"],
+        "tech_stack": project["tech_stack"],
+        "github_link": project.get("github_link"),
+        "live_link": project.get("live_link"),
+        "image_url": project.get("image_url"),
+        "order": project.get("order", 999)
+    }
+
+
+def legacy_skill(skill):
+    return {
+        "id": str(skill["_id"]),
+        "name": skill["name"],
+        "category": skill["category"],
+        "proficiency": skill["proficiency"]
+    }
+
+
+def legacy_event(event):
+    return {
+        "id": str(event["_id"]),
+        "type": event["type"],
+        "timestamp": event["timestamp"].isoformat(),
+        **{k: v for k, v in event.items() if k not in ["_id", "type", "timestamp"]}
+    }
+
+
+def _documents(n):
+    now = datetime.utcnow()
+    return {
+        "contacts": [
+            {"_id": ObjectId(), "name": f"Visitor {i}", "email": f"v{i}@example.com",
+             "message": "Hello! " * 20, "read": i % 3 == 0, "created_at": now - timedelta(minutes=i)}
+            for i in range(n)
+        ],
+        "projects": [
+            {"_id": ObjectId(), "title": f"Project {i}", "description": "A project. " * 10,
+             "tech_stack": ["React", "Flask", "MongoDB"], "github_link": "https://github.com/x/y",
+             "live_link": None, "image_url": "https://example.com/i.png", "order": i,
+             "created_at": now}
+            for i in range(n)
+        ],
+        "skills": [
+            {"_id": ObjectId(), "name": f"Skill {i}", "category": "Backend",
+             "proficiency": "Advanced", "created_at": now}
+            for i in range(n)
+        ],
+        "events": [
+            {"_id": ObjectId(), "type": "page_view", "page": "/about", "referrer": None,
+             "user_agent": "Mozilla/5.0", "visitor_id": "0123456789abcdef", "weight": 1.0,
+             "timestamp": now - timedelta(seconds=i)}
+            if i % 4 else
+            {"_id": ObjectId(), "type": "project_click", "project_id": "abc123",
+             "project_title": "Project", "timestamp": now - timedelta(seconds=i)}
+            for i in range(n)
+        ]
+    }
+
+
+CASES = {
+    "contacts": (legacy_contact, ContactModel),
+    "projects": (legacy_project, ProjectModel),
+    "skills": (legacy_skill, SkillModel),
+    "events": (legacy_event, AnalyticsModel)
+}
+
+
+def _best_ms(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def run(n, repeat):
+    documents = _documents(n)
+    print(f"{n} documents, best of {repeat} (ms)")
+    print(f"{'model':10} {'legacy':>8} {'schema':>8} {'legacy+json':>12} {'schema+json':>12}")
+    for name, (legacy, model) in CASES.items():
+        docs = documents[name]
+        timings = (
+            _best_ms(lambda: [legacy(doc) for doc in docs], repeat),
+            _best_ms(lambda: model.serialize_many(docs), repeat),
+            _best_ms(lambda: dumps_bytes([legacy(doc) for doc in docs]), repeat),
+            _best_ms(lambda: dumps_bytes(model.serialize_many(docs)), repeat)
+        )
+        print(f"{name:10} {timings[0]:8.2f} {timings[1]:8.2f} {timings[2]:12.2f} {timings[3]:12.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+    run(args.docs, args.repeat)
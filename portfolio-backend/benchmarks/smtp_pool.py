@@ -0,0 +1,86 @@
+"""
+Outbox SMTP throughput: a new connection per message vs one SMTPSession
+
+Sends to a local aiosmtpd sink (no TLS), so the numbers measure connection
+setup and protocol round trips rather than a real provider's latency.
+
+    cd portfolio-backend && python -m benchmarks.smtp_pool --messages 200
+"""
+
+import argparse
+import socket
+import time
+
+from aiosmtpd.controller import Controller
+from flask import Flask
+from flask_mail import Mail
+
+from utils.email import SMTPSession, to_message
+
+
+class Sink:
+    def __init__(self):
+        self.received = 0
+        self.connections = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _email(n):
+    return {"subject": f"Benchmark {n}", "recipients": ["owner@example.com"], "body": "x" * 500}
+
+
+def run(messages):
+    sink = Sink()
+    controller = Controller(sink, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+
+    app = Flask(__name__)
+    app.config.update(
+        MAIL_SERVER="127.0.0.1",
+        MAIL_PORT=controller.port,
+        MAIL_USE_TLS=False,
+        MAIL_DEFAULT_SENDER="site@example.com"
+    )
+    mail = Mail(app)
+
+    results = {}
+    try:
+        with app.app_context():
+            sink.connections = 0
+            started = time.perf_counter()
+            for n in range(messages):
+                mail.send(to_message(_email(n)))
+            results["connection per message"] = (time.perf_counter() - started, sink.connections)
+
+            sink.connections = 0
+            session = SMTPSession(mail)
+            started = time.perf_counter()
+            for n in range(messages):
+                session.send(to_message(_email(n)))
+            session.close()
+            results["pooled session"] = (time.perf_counter() - started, sink.connections)
+    finally:
+        controller.stop()
+
+    for name, (elapsed, connections) in results.items():
+        print(f"{name:24} {messages / elapsed:8.0f} msg/s  connections={connections}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200)
+    run(parser.parse_args().messages)
@@ -24,5 +24,90 @@ class Config:
     # CORS
     FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
 
+    # Reverse proxies in front of the app whose X-Forwarded-For/-Proto are
+    # trusted (1 behind the bundled nginx); 0 uses the socket peer address
+    TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', 0))
+
+    # Admin contacts inbox (page size cap, also the bulk mark-read id cap)
+    CONTACTS_MAX_LIMIT = int(os.getenv('CONTACTS_MAX_LIMIT', 200))
+
+    # Email outbox (background delivery with retries)
+    OUTBOX_WORKERS = int(os.getenv('OUTBOX_WORKERS', 2))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 8))
+    OUTBOX_BACKOFF_BASE = float(os.getenv('OUTBOX_BACKOFF_BASE', 30))
+    OUTBOX_BACKOFF_MAX = float(os.getenv('OUTBOX_BACKOFF_MAX', 3600))
+    OUTBOX_LEASE_SECONDS = float(os.getenv('OUTBOX_LEASE_SECONDS', 120))
+    OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 5))
+    # Seconds an idle SMTP connection is kept open for the next message
+    SMTP_IDLE_TIMEOUT = float(os.getenv('SMTP_IDLE_TIMEOUT', 30))
+    # Socket timeout for SMTP operations; kept below OUTBOX_LEASE_SECONDS so a
+    # hung send fails before another worker can claim the message
+    SMTP_TIMEOUT = float(os.getenv('SMTP_TIMEOUT', 30))
+    # Batch admin notifications into one email every N minutes (0 = send each)
+    ADMIN_DIGEST_MINUTES = int(os.getenv('ADMIN_DIGEST_MINUTES', 0))
+
     # Admin Setup Key (REQUIRED for auth/setup endpoint)
-    SETUP_KEY = os.getenv('SETUP_KEY')
\ No newline at end of file
+    SETUP_KEY = os.getenv('SETUP_KEY')
+
+    # Analytics storage
+    ANALYTICS_COLLECTION = os.getenv('ANALYTICS_COLLECTION', 'analytics')
+    ANALYTICS_TIMESERIES = os.getenv('ANALYTICS_TIMESERIES', 'False') == 'True'
+    ANALYTICS_TIMESERIES_GRANULARITY = os.getenv('ANALYTICS_TIMESERIES_GRANULARITY', 'minutes')
+
+    # Analytics write buffer
+    ANALYTICS_BUFFER_MAX_SIZE = int(os.getenv('ANALYTICS_BUFFER_MAX_SIZE', 10000))
+    ANALYTICS_BUFFER_BATCH_SIZE = int(os.getenv('ANALYTICS_BUFFER_BATCH_SIZE', 500))
+    ANALYTICS_BUFFER_FLUSH_INTERVAL = float(os.getenv('ANALYTICS_BUFFER_FLUSH_INTERVAL', 2.0))
+    ANALYTICS_BUFFER_PUT_TIMEOUT = float(os.getenv('ANALYTICS_BUFFER_PUT_TIMEOUT', 0))
+    ANALYTICS_SPOOL_DIR = os.getenv('ANALYTICS_SPOOL_DIR', 'spool/analytics')
+    ANALYTICS_SPOOL_SEGMENT_BYTES = int(os.getenv('ANALYTICS_SPOOL_SEGMENT_BYTES', 16 * 1024 * 1024))
+    ANALYTICS_SPOOL_FSYNC_INTERVAL = float(os.getenv('ANALYTICS_SPOOL_FSYNC_INTERVAL', 1.0))
+    ANALYTICS_SPOOL_REPLAY_INTERVAL = float(os.getenv('ANALYTICS_SPOOL_REPLAY_INTERVAL', 5.0))
+    ANALYTICS_BATCH_MAX_EVENTS = int(os.getenv('ANALYTICS_BATCH_MAX_EVENTS', 100))
+    ANALYTICS_DASHBOARD_CACHE_TTL = int(os.getenv('ANALYTICS_DASHBOARD_CACHE_TTL', 60))
+    ANALYTICS_EVENTS_MAX_LIMIT = int(os.getenv('ANALYTICS_EVENTS_MAX_LIMIT', 200))
+
+    # Adaptive page-view sampling (thresholds are per worker)
+    ANALYTICS_SAMPLING_ENABLED = os.getenv('ANALYTICS_SAMPLING_ENABLED', 'True') == 'True'
+    ANALYTICS_SAMPLING_MAX_EVENTS_PER_SECOND = float(os.getenv('ANALYTICS_SAMPLING_MAX_EVENTS_PER_SECOND', 50))
+    ANALYTICS_SAMPLING_MAX_LATENCY_MS = float(os.getenv('ANALYTICS_SAMPLING_MAX_LATENCY_MS', 250))
+    ANALYTICS_SAMPLING_MIN_RATE = float(os.getenv('ANALYTICS_SAMPLING_MIN_RATE', 0.01))
+
+    # Decode list-endpoint documents lazily (bson RawBSONDocument)
+    RAW_BSON_LISTS = os.getenv('RAW_BSON_LISTS', 'False') == 'True'
+
+    # Bulk export
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+
+    # In-process cache
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+    CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    CACHE_SWEEP_INTERVAL = float(os.getenv('CACHE_SWEEP_INTERVAL', 30))
+
+    # Shared (L2) cache: none | sqlite | redis
+    CACHE_L2_BACKEND = os.getenv('CACHE_L2_BACKEND', 'none')
+    CACHE_SQLITE_PATH = os.getenv('CACHE_SQLITE_PATH', '/tmp/portfolio-cache/cache.sqlite3')
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+    # Response compression (brotli is used when the package is installed)
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True') == 'True'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+    COMPRESSION_MIMETYPES = (
+        'application/json',
+        'application/x-ndjson',
+        'text/csv',
+        'text/plain',
+        'text/html'
+    )
+
+    # Cross-worker invalidation bus: none | local | unix | redis
+    CACHE_BUS = os.getenv('CACHE_BUS', 'unix')
+    CACHE_BUS_SOCKET_DIR = os.getenv('CACHE_BUS_SOCKET_DIR', '/tmp/portfolio-cache/bus')
+
+    # Public catalog (projects/skills) caching; writes invalidate immediately
+    CATALOG_CACHE_TTL = int(os.getenv('CATALOG_CACHE_TTL', 3600))
+    CATALOG_CACHE_STALE_TTL = int(os.getenv('CATALOG_CACHE_STALE_TTL', 300))
+    # Browser/proxy max-age for catalog GETs (0 = always revalidate via ETag)
+    CATALOG_HTTP_MAX_AGE = int(os.getenv('CATALOG_HTTP_MAX_AGE', 0))
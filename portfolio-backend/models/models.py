@@ -1,9 +1,78 @@
 # models/models.py
+# Each model declares its schema once (FIELDS: output field -> document field,
+# in output order). serialize()/serialize_many(), PROJECTION and the sparse
+# fieldsets in utils.fieldsets are built from it. Serializers return
+# ObjectId/datetime values as-is; the app's JSON provider
+# (utils.json_provider) encodes them as hex strings / ISO 8601.
 from datetime import datetime
 from bson import ObjectId
 
 
+_REQUIRED = object()
+_MISSING = object()
+
+
+def build_serializers(fields, defaults=None, omit_missing=False):
+    """
+    Build serializers for a schema
+    Args:
+        fields (dict): output field -> document field, in output order
+        defaults (dict): output field -> value used when the document lacks
+            the field; fields without a default are required
+        omit_missing (bool): leave missing fields out instead
+    Returns:
+        tuple: (serialize(doc) -> dict, serialize_many(docs) -> list)
+    """
+    defaults = defaults or {}
+
+    if omit_missing:
+        items = tuple(fields.items())
+
+        def serialize(doc):
+            out = {}
+            get = doc.get
+            for out_field, source in items:
+                value = get(source, _MISSING)
+                if value is not _MISSING:
+                    out[out_field] = value
+            return out
+    else:
+        specs = tuple(
+            (out_field, source, defaults.get(out_field, _REQUIRED))
+            for out_field, source in fields.items()
+        )
+
+        def serialize(doc):
+            return {
+                out_field: doc[source] if default is _REQUIRED else doc.get(source, default)
+                for out_field, source, default in specs
+            }
+
+    def serialize_many(docs):
+        return [serialize(doc) for doc in docs]
+
+    return serialize, serialize_many
+
+
+def projection_for(fields):
+    """Inclusion projection for a schema's document fields (_id is implicit)"""
+    return {source: 1 for source in fields.values() if source != "_id"}
+
+
 class ContactModel:
+    FIELDS = {
+        "id": "_id", "name": "name", "email": "email", "message": "message",
+        "read": "read", "created_at": "created_at"
+    }
+    DEFAULTS = {"read": False}
+    VIEWS = {
+        "summary": ("id", "name", "email", "read", "created_at"),
+        "full": None
+    }
+    EXPORT_COLUMNS = list(FIELDS)
+    PROJECTION = projection_for(FIELDS)
+    serialize, serialize_many = map(staticmethod, build_serializers(FIELDS, DEFAULTS))
+
     @staticmethod
     def create(name, email, message):
         return {
@@ -14,19 +83,21 @@ class ContactModel:
             "created_at": datetime.utcnow()
         }
 
-    @staticmethod
-    def serialize(contact):
-        return {
-            "id": str(contact["_id"]),
-            "name": contact["name"],
-            "email": contact["email"],
-            "message": contact["message"],
-            "read": contact.get("read", False),
-            "created_at": contact["created_at"].isoformat()
-        }
-
 
 class ProjectModel:
+    FIELDS = {
+        "id": "_id", "title": "title", "description": "description",
+        "tech_stack": "tech_stack", "github_link": "github_link",
+        "live_link": "live_link", "image_url": "image_url", "order": "order"
+    }
+    DEFAULTS = {"github_link": None, "live_link": None, "image_url": None, "order": 999}
+    VIEWS = {
+        "summary": ("id", "title", "tech_stack", "image_url"),
+        "full": None
+    }
+    PROJECTION = projection_for(FIELDS)
+    serialize, serialize_many = map(staticmethod, build_serializers(FIELDS, DEFAULTS))
+
     @staticmethod
     def create(title, description, tech_stack, github_link=None, live_link=None, image_url=None):
         return {
@@ -40,21 +111,17 @@ class ProjectModel:
             "order": 999
         }
 
-    @staticmethod
-    def serialize(project):
-        return {
-            "id": str(project["_id"]),
-            "title": project["title"],
-            "description": project["description"],
-            "tech_stack": project["tech_stack"],
-            "github_link": project.get("github_link"),
-            "live_link": project.get("live_link"),
-            "image_url": project.get("image_url"),
-            "order": project.get("order", 999)
-        }
-
 
 class SkillModel:
+    FIELDS = {"id": "_id", "name": "name", "category": "category", "proficiency": "proficiency"}
+    DEFAULTS = {}
+    VIEWS = {
+        "summary": ("id", "name", "category"),
+        "full": None
+    }
+    PROJECTION = projection_for(FIELDS)
+    serialize, serialize_many = map(staticmethod, build_serializers(FIELDS, DEFAULTS))
+
     @staticmethod
     def create(name, category, proficiency):
         return {
@@ -64,24 +131,86 @@ class SkillModel:
             "created_at": datetime.utcnow()
         }
 
+
+class AnalyticsModel:
+    EVENT_TYPES = ("page_view", "project_click")
+    EXPORT_COLUMNS = [
+        "id", "type", "timestamp", "page", "referrer", "user_agent",
+        "visitor_id", "project_id", "project_title"
+    ]
+    # Each event type only has some of these; missing fields are omitted.
+    # visitor_id is left out of the public representation and only exported.
+    FIELDS = {
+        "id": "_id", "type": "type", "timestamp": "timestamp", "page": "page",
+        "referrer": "referrer", "user_agent": "user_agent",
+        "project_id": "project_id", "project_title": "project_title", "weight": "weight"
+    }
+    EXPORT_FIELDS = {
+        "id": "_id", "type": "type", "timestamp": "timestamp", "page": "page",
+        "referrer": "referrer", "user_agent": "user_agent", "visitor_id": "visitor_id",
+        "project_id": "project_id", "project_title": "project_title", "weight": "weight"
+    }
+    DEFAULTS = {}
+    OMIT_MISSING = True
+    VIEWS = {
+        "summary": ("id", "type", "timestamp", "page", "project_id"),
+        "full": None
+    }
+    PROJECTION = projection_for(FIELDS)
+    EXPORT_PROJECTION = projection_for(EXPORT_FIELDS)
+    serialize, serialize_many = map(
+        staticmethod, build_serializers(FIELDS, DEFAULTS, omit_missing=OMIT_MISSING)
+    )
+    serialize_export = staticmethod(
+        build_serializers(EXPORT_FIELDS, DEFAULTS, omit_missing=OMIT_MISSING)[0]
+    )
+
     @staticmethod
-    def serialize(skill):
-        return {
-            "id": str(skill["_id"]),
-            "name": skill["name"],
-            "category": skill["category"],
-            "proficiency": skill["proficiency"]
-        }
+    def from_payload(data, referrer=None, user_agent=None, visitor_id=None, sampler=None):
+        """
+        Build an event document from a client payload
+        Page views pass through `sampler` (if given) and may be skipped
+        under load, in which case None is returned.
+        Raises:
+            ValueError: if the payload is not a valid event
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Event must be an object")
 
+        event_type = data.get('type')
+        if event_type == 'page_view':
+            page = data.get('page')
+            if not isinstance(page, str) or not page:
+                raise ValueError("page_view requires a page")
+            weight = sampler.sample() if sampler else 1.0
+            if weight is None:
+                return None
+            return AnalyticsModel.create_page_view(
+                page=page,
+                referrer=referrer,
+                user_agent=user_agent,
+                visitor_id=visitor_id,
+                weight=weight
+            )
+        elif event_type == 'project_click':
+            project_id = data.get('project_id')
+            if not isinstance(project_id, str) or not project_id:
+                raise ValueError("project_click requires a project_id")
+            return AnalyticsModel.create_project_click(
+                project_id=project_id,
+                project_title=data.get('project_title')
+            )
+        raise ValueError("Invalid event type")
 
-class AnalyticsModel:
     @staticmethod
-    def create_page_view(page, referrer=None, user_agent=None):
+    def create_page_view(page, referrer=None, user_agent=None, visitor_id=None, weight=1.0):
         return {
             "type": "page_view",
             "page": page,
             "referrer": referrer,
             "user_agent": user_agent,
+            "visitor_id": visitor_id,
+            "weight": weight,
             "timestamp": datetime.utcnow()
         }
 
@@ -93,12 +222,3 @@ class AnalyticsModel:
             "project_title": project_title,
             "timestamp": datetime.utcnow()
         }
-
-    @staticmethod
-    def serialize(event):
-        return {
-            "id": str(event["_id"]),
-            "type": event["type"],
-            "timestamp": event["timestamp"].isoformat(),
-            **{k: v for k, v in event.items() if k not in ["_id", "type", "timestamp"]}
-        }
\ No newline at end of file
@@ -1,11 +1,32 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
 from models.models import AnalyticsModel
-from utils.database import analytics_collection
+from config.config import Config
+from utils.database import db_manager, analytics_collection, listing_collection, cached
+from utils.analytics_buffer import analytics_buffer
+from utils.analytics_rollup import rollups_ready, window_counts, unique_visitors_estimate, EVENT_WEIGHT
+from utils.sampling import analytics_sampler
+from utils.hyperloglog import visitor_fingerprint
+from utils.pagination import parse_limit, parse_datetime, keyset_filter, keyset_page
+from utils.export import EXPORT_FORMATS, export_response
+from utils.fieldsets import many_serializer, projection, resolve_fields
+from utils.auth import admin_required
 
 analytics_bp = Blueprint('analytics', __name__)
 
 
+def _request_visitor_id():
+    """
+    Hashed visitor fingerprint for unique visitor sketches
+    remote_addr is the client address when TRUSTED_PROXIES is set (ProxyFix)
+    """
+    return visitor_fingerprint(
+        request.remote_addr,
+        request.headers.get('User-Agent'),
+        Config.SECRET_KEY
+    )
+
+
 @analytics_bp.route('/analytics/track', methods=['POST'])
 def track_event():
     """
@@ -20,142 +41,114 @@ def track_event():
     """
     try:
         data = request.get_json()
-        event_type = data.get('type')
 
-        if event_type == 'page_view':
-            event_doc = AnalyticsModel.create_page_view(
-                page=data.get('page'),
+        try:
+            event_doc = AnalyticsModel.from_payload(
+                data,
                 referrer=request.referrer,
-                user_agent=request.headers.get('User-Agent')
-            )
-        elif event_type == 'project_click':
-            event_doc = AnalyticsModel.create_project_click(
-                project_id=data.get('project_id'),
-                project_title=data.get('project_title')
+                user_agent=request.headers.get('User-Agent'),
+                visitor_id=_request_visitor_id(),
+                sampler=analytics_sampler
             )
-        else:
-            return jsonify({"error": "Invalid event type"}), 400
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        # Save to database
-        analytics_collection.insert_one(event_doc)
+        if event_doc is None:
+            # Sampled out under load; its weight is carried by kept events
+            return jsonify({"message": "Event accepted"}), 202
 
-        return jsonify({"message": "Event tracked successfully"}), 201
+        # Queue for a batched background write
+        if not analytics_buffer.submit(event_doc):
+            return jsonify({"error": "Analytics buffer full, event dropped"}), 503
+
+        return jsonify({"message": "Event accepted"}), 202
 
     except Exception as e:
         print(f"Error in track_event: {e}")
         return jsonify({"error": "Failed to track event"}), 500
 
 
+@analytics_bp.route('/analytics/track/batch', methods=['POST'])
+def track_events_batch():
+    """
+    Track several analytics events in one request
+    POST /api/analytics/track/batch
+    Body: { "events": [ {...}, {...} ] }  or a bare array of events
+    Accepts text/plain bodies so navigator.sendBeacon can post without a preflight.
+    Returns per-event results: accepted, rejected (with error) or dropped;
+    400 if every event was rejected.
+    """
+    try:
+        data = request.get_json(force=True, silent=True)
+        events = data.get('events') if isinstance(data, dict) else data
+
+        if not isinstance(events, list) or not events:
+            return jsonify({"error": "No events provided"}), 400
+
+        if len(events) > Config.ANALYTICS_BATCH_MAX_EVENTS:
+            return jsonify({
+                "error": f"At most {Config.ANALYTICS_BATCH_MAX_EVENTS} events per batch"
+            }), 400
+
+        referrer = request.referrer
+        user_agent = request.headers.get('User-Agent')
+        visitor_id = _request_visitor_id()
+
+        # Validate everything first, then hand the valid events over in one go
+        results = []
+        valid_indexes = []
+        event_docs = []
+        for index, event in enumerate(events):
+            try:
+                event_doc = AnalyticsModel.from_payload(
+                    event, referrer, user_agent, visitor_id, sampler=analytics_sampler
+                )
+                if event_doc is not None:
+                    event_docs.append(event_doc)
+                    valid_indexes.append(index)
+                results.append({"index": index, "status": "accepted"})
+            except ValueError as e:
+                results.append({"index": index, "status": "rejected", "error": str(e)})
+
+        queued = analytics_buffer.submit_many(event_docs)
+        for index, ok in zip(valid_indexes, queued):
+            if not ok:
+                results[index] = {"index": index, "status": "dropped"}
+
+        accepted = sum(1 for r in results if r["status"] == "accepted")
+        rejected = sum(1 for r in results if r["status"] == "rejected")
+        summary = {
+            "accepted": accepted,
+            "rejected": rejected,
+            "dropped": sum(1 for r in results if r["status"] == "dropped"),
+            "results": results
+        }
+
+        if rejected == len(events):
+            return jsonify({"error": "All events were rejected", **summary}), 400
+
+        return jsonify(summary), 202 if accepted or not event_docs else 503
+
+    except Exception as e:
+        print(f"Error in track_events_batch: {e}")
+        return jsonify({"error": "Failed to track events"}), 500
+
+
 @analytics_bp.route('/analytics/dashboard', methods=['GET'])
 def get_dashboard_stats():
     """
     Get analytics dashboard statistics
     GET /api/analytics/dashboard?days=30
+    Served from hourly rollups once they have been backfilled,
+    otherwise computed from raw events.
     """
     try:
         # Get number of days from query params (default 30)
         days = int(request.args.get('days', 30))
-        start_date = datetime.utcnow() - timedelta(days=days)
-
-        # Total page views
-        total_page_views = analytics_collection.count_documents({
-            "type": "page_view",
-            "timestamp": {"$gte": start_date}
-        })
-
-        # Page views by page
-        page_views_pipeline = [
-            {"$match": {
-                "type": "page_view",
-                "timestamp": {"$gte": start_date}
-            }},
-            {"$group": {
-                "_id": "$page",
-                "count": {"$sum": 1}
-            }},
-            {"$sort": {"count": -1}}
-        ]
-        page_views = list(analytics_collection.aggregate(page_views_pipeline))
-        page_views_formatted = [
-            {"page": pv["_id"], "views": pv["count"]}
-            for pv in page_views
-        ]
-
-        # Total project clicks
-        total_project_clicks = analytics_collection.count_documents({
-            "type": "project_click",
-            "timestamp": {"$gte": start_date}
-        })
-
-        # Most clicked projects
-        project_clicks_pipeline = [
-            {"$match": {
-                "type": "project_click",
-                "timestamp": {"$gte": start_date}
-            }},
-            {"$group": {
-                "_id": "$project_id",
-                "title": {"$first": "$project_title"},
-                "clicks": {"$sum": 1}
-            }},
-            {"$sort": {"clicks": -1}},
-            {"$limit": 10}
-        ]
-        popular_projects = list(analytics_collection.aggregate(project_clicks_pipeline))
-        popular_projects_formatted = [
-            {
-                "project_id": proj["_id"],
-                "title": proj["title"],
-                "clicks": proj["clicks"]
-            }
-            for proj in popular_projects
-        ]
-
-        # Daily page views (last 7 days)
-        daily_views_pipeline = [
-            {"$match": {
-                "type": "page_view",
-                "timestamp": {"$gte": datetime.utcnow() - timedelta(days=7)}
-            }},
-            {"$group": {
-                "_id": {
-                    "$dateToString": {
-                        "format": "%Y-%m-%d",
-                        "date": "$timestamp"
-                    }
-                },
-                "views": {"$sum": 1}
-            }},
-            {"$sort": {"_id": 1}}
-        ]
-        daily_views = list(analytics_collection.aggregate(daily_views_pipeline))
-        daily_views_formatted = [
-            {"date": dv["_id"], "views": dv["views"]}
-            for dv in daily_views
-        ]
-
-        # Unique visitors (approximation based on user agents)
-        unique_visitors_pipeline = [
-            {"$match": {
-                "type": "page_view",
-                "timestamp": {"$gte": start_date}
-            }},
-            {"$group": {
-                "_id": "$user_agent"
-            }},
-            {"$count": "total"}
-        ]
-        unique_visitors_result = list(analytics_collection.aggregate(unique_visitors_pipeline))
-        unique_visitors = unique_visitors_result[0]["total"] if unique_visitors_result else 0
 
         return jsonify({
             "period": f"Last {days} days",
-            "total_page_views": total_page_views,
-            "total_project_clicks": total_project_clicks,
-            "unique_visitors": unique_visitors,
-            "page_views_by_page": page_views_formatted,
-            "popular_projects": popular_projects_formatted,
-            "daily_views": daily_views_formatted
+            **_dashboard_stats(days)
         }), 200
 
     except Exception as e:
@@ -163,25 +156,238 @@ def get_dashboard_stats():
         return jsonify({"error": "Failed to fetch analytics"}), 500
 
 
+@cached(ttl_seconds=Config.ANALYTICS_DASHBOARD_CACHE_TTL, single_flight=True)
+def _dashboard_stats(days):
+    """Dashboard statistics for the last `days` days, cached briefly per `days`"""
+    start_date = datetime.utcnow() - timedelta(days=days)
+    if rollups_ready():
+        return _dashboard_from_rollups(start_date)
+    return _dashboard_from_raw(start_date)
+
+
+def _dashboard_from_rollups(start_date):
+    """
+    Dashboard statistics from the hourly rollup collection
+    Unique visitors are estimated from the per-day HyperLogLog sketches.
+    """
+    counts = window_counts(start_date)
+
+    page_views = {}
+    project_clicks = {}
+    for (event_type, key, _day), entry in counts.items():
+        if event_type == "page_view":
+            page_views[key] = page_views.get(key, 0) + entry["count"]
+        elif event_type == "project_click":
+            click = project_clicks.setdefault(key, {"clicks": 0, "title": None})
+            click["clicks"] += entry["count"]
+            click["title"] = entry["title"] or click["title"]
+
+    # Daily page views (last 7 days)
+    daily = {}
+    for (event_type, _key, day), entry in window_counts(datetime.utcnow() - timedelta(days=7)).items():
+        if event_type == "page_view":
+            daily[day] = daily.get(day, 0) + entry["count"]
+
+    popular_projects = sorted(project_clicks.items(), key=lambda item: item[1]["clicks"], reverse=True)[:10]
+
+    return {
+        "total_page_views": round(sum(page_views.values())),
+        "total_project_clicks": round(sum(c["clicks"] for c in project_clicks.values())),
+        "unique_visitors": unique_visitors_estimate(start_date),
+        "page_views_by_page": [
+            {"page": page, "views": round(views)}
+            for page, views in sorted(page_views.items(), key=lambda item: item[1], reverse=True)
+        ],
+        "popular_projects": [
+            {"project_id": project_id, "title": click["title"], "clicks": round(click["clicks"])}
+            for project_id, click in popular_projects
+        ],
+        "daily_views": [
+            {"date": day, "views": round(views)}
+            for day, views in sorted(daily.items())
+        ]
+    }
+
+
+def _dashboard_from_raw(start_date, collection=None, timeseries=None):
+    """
+    Dashboard statistics computed directly from raw events
+    A single $facet aggregation over the (type, timestamp) index replaces
+    one round trip per statistic.
+    Args:
+        timeseries (bool): whether `collection` is a time-series collection,
+            defaults to the configured analytics collection
+    """
+    collection = collection if collection is not None else analytics_collection
+    event_type, page, project_id = (
+        db_manager.analytics_field(name, timeseries) for name in ('type', 'page', 'project_id')
+    )
+    week_start = datetime.utcnow() - timedelta(days=7)
+    page_view_match = {"$match": {event_type: "page_view", "timestamp": {"$gte": start_date}}}
+
+    pipeline = [
+        {"$match": {
+            event_type: {"$in": ["page_view", "project_click"]},
+            "timestamp": {"$gte": min(start_date, week_start)}
+        }},
+        {"$facet": {
+            "totals": [
+                {"$match": {"timestamp": {"$gte": start_date}}},
+                {"$group": {"_id": f"${event_type}", "count": {"$sum": EVENT_WEIGHT}}}
+            ],
+            "page_views": [
+                page_view_match,
+                {"$group": {"_id": f"${page}", "count": {"$sum": EVENT_WEIGHT}}},
+                {"$sort": {"count": -1}}
+            ],
+            "popular_projects": [
+                {"$match": {event_type: "project_click", "timestamp": {"$gte": start_date}}},
+                {"$group": {
+                    "_id": f"${project_id}",
+                    "title": {"$first": "$project_title"},
+                    "clicks": {"$sum": EVENT_WEIGHT}
+                }},
+                {"$sort": {"clicks": -1}},
+                {"$limit": 10}
+            ],
+            # Daily page views (last 7 days)
+            "daily_views": [
+                {"$match": {event_type: "page_view", "timestamp": {"$gte": week_start}}},
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+                    "views": {"$sum": EVENT_WEIGHT}
+                }},
+                {"$sort": {"_id": 1}}
+            ],
+            # Unique visitors (approximation based on user agents)
+            "unique_visitors": [
+                page_view_match,
+                {"$group": {"_id": "$user_agent"}},
+                {"$count": "total"}
+            ]
+        }}
+    ]
+    facets = next(collection.aggregate(pipeline, allowDiskUse=True))
+    totals = {t["_id"]: t["count"] for t in facets["totals"]}
+
+    return {
+        "total_page_views": round(totals.get("page_view", 0)),
+        "total_project_clicks": round(totals.get("project_click", 0)),
+        "unique_visitors": facets["unique_visitors"][0]["total"] if facets["unique_visitors"] else 0,
+        "page_views_by_page": [
+            {"page": pv["_id"], "views": round(pv["count"])}
+            for pv in facets["page_views"]
+        ],
+        "popular_projects": [
+            {"project_id": proj["_id"], "title": proj["title"], "clicks": round(proj["clicks"])}
+            for proj in facets["popular_projects"]
+        ],
+        "daily_views": [
+            {"date": dv["_id"], "views": round(dv["views"])}
+            for dv in facets["daily_views"]
+        ]
+    }
+
+
 @analytics_bp.route('/analytics/events', methods=['GET'])
 def get_recent_events():
     """
-    Get recent analytics events
-    GET /api/analytics/events?limit=50
+    Get analytics events, newest first, with keyset pagination
+    GET /api/analytics/events?limit=50&cursor=...&type=page_view&page=/about
+                              &project_id=...&since=2024-01-01T00:00:00&until=...
+                              &view=summary|full&fields=id,type,timestamp
+    Returns { "events": [...], "next_cursor": "..." | null }. Pass next_cursor
+    back as `cursor` for the following page; each page costs the same no
+    matter how deep. limit is capped at ANALYTICS_EVENTS_MAX_LIMIT.
     """
     try:
-        limit = int(request.args.get('limit', 50))
+        try:
+            limit = parse_limit(
+                request.args.get('limit'),
+                default=50,
+                maximum=Config.ANALYTICS_EVENTS_MAX_LIMIT
+            )
+            since = parse_datetime(request.args.get('since'))
+            until = parse_datetime(request.args.get('until'))
+            fields = resolve_fields(AnalyticsModel, request.args)
+
+            query = {}
+            for field in ('type', 'page', 'project_id'):
+                if request.args.get(field):
+                    query[db_manager.analytics_field(field)] = request.args[field]
+            if since or until:
+                query['timestamp'] = {}
+                if since:
+                    query['timestamp']['$gte'] = since
+                if until:
+                    query['timestamp']['$lt'] = until
+            if request.args.get('cursor'):
+                query = {"$and": [query, keyset_filter('timestamp', request.args['cursor'])]}
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        events = list(
-            analytics_collection.find()
-            .sort("timestamp", -1)
-            .limit(limit)
+        # The cursor for the next page needs timestamp and _id
+        cursor = (
+            listing_collection(analytics_collection)
+            .find(query, projection(AnalyticsModel, fields, required=('id', 'timestamp')))
+            .sort([("timestamp", -1), ("_id", -1)])
+            .limit(limit + 1)
         )
+        events, next_cursor = keyset_page(cursor, 'timestamp', limit)
 
         return jsonify({
-            "events": [AnalyticsModel.serialize(e) for e in events]
+            "events": many_serializer(AnalyticsModel, fields)(events),
+            "next_cursor": next_cursor
         }), 200
 
     except Exception as e:
         print(f"Error in get_recent_events: {e}")
-        return jsonify({"error": "Failed to fetch events"}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to fetch events"}), 500
+
+
+@analytics_bp.route('/analytics/export', methods=['GET'])
+@admin_required
+def export_events(username):
+    """
+    Stream analytics events as NDJSON or CSV (admin only)
+    GET /api/analytics/export?format=ndjson|csv&since=...&until=...&type=page_view
+    Gzip-compressed on the fly when the client accepts it.
+    """
+    try:
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+        try:
+            since = parse_datetime(request.args.get('since'))
+            until = parse_datetime(request.args.get('until'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        query = {}
+        if request.args.get('type'):
+            query[db_manager.analytics_field('type')] = request.args['type']
+        if since or until:
+            query['timestamp'] = {}
+            if since:
+                query['timestamp']['$gte'] = since
+            if until:
+                query['timestamp']['$lt'] = until
+
+        cursor = (
+            listing_collection(analytics_collection)
+            .find(query, AnalyticsModel.EXPORT_PROJECTION)
+            .sort([("timestamp", 1), ("_id", 1)])
+            .batch_size(Config.EXPORT_BATCH_SIZE)
+        )
+        return export_response(
+            cursor,
+            AnalyticsModel.serialize_export,
+            fmt,
+            AnalyticsModel.EXPORT_COLUMNS,
+            "analytics"
+        )
+
+    except Exception as e:
+        print(f"Error in export_events: {e}")
+        return jsonify({"error": "Failed to export events"}), 500
@@ -1,17 +1,44 @@
+from bson import ObjectId
+from bson.errors import InvalidId
 from flask import Blueprint, request, jsonify
 from models.models import ContactModel
-from utils.database import contacts_collection
-from utils.email import send_contact_notification, send_confirmation_email
+from utils.counters import UNREAD_CONTACTS, count_unread_contacts, get_counter, incr_counter
+from utils.database import contacts_collection, listing_collection
+from utils.fieldsets import many_serializer, projection, resolve_fields
+from utils.email import build_contact_notification, build_confirmation_email
+from utils.export import EXPORT_FORMATS, export_response
+from utils.outbox import email_outbox
+from utils.pagination import keyset_filter, keyset_page, parse_datetime, parse_limit
+from config.config import Config
 
 contact_bp = Blueprint('contact', __name__)
 
 
+def unread_count():
+    """Unread contacts, from the counter kept in step with every read/insert"""
+    return get_counter(UNREAD_CONTACTS, count_unread_contacts)
+
+
+def _parse_read_filter(value):
+    """
+    ?read=true|false -> bool, or None when absent
+    Raises:
+        ValueError: for any other value
+    """
+    if value in (None, ''):
+        return None
+    if value in ('true', 'false'):
+        return value == 'true'
+    raise ValueError("read must be true or false")
+
+
 @contact_bp.route('/contact', methods=['POST'])
-def submit_contact(mail):
+def submit_contact():
     """
     Handle contact form submission
     POST /api/contact
     Body: { "name": "John", "email": "john@example.com", "message": "Hello!" }
+    Emails are queued in the outbox and delivered in the background.
     """
     try:
         data = request.get_json()
@@ -33,15 +60,26 @@ def submit_contact(mail):
 
         # Save to database
         result = contacts_collection.insert_one(contact_doc)
+        incr_counter(UNREAD_CONTACTS)
 
-        # Send email notifications
-        notification_sent = send_contact_notification(mail, name, email, message)
-        confirmation_sent = send_confirmation_email(mail, email, name)
+        # Queue email notifications for background delivery
+        try:
+            email_outbox.enqueue(
+                [
+                    build_contact_notification(name, email, message),
+                    build_confirmation_email(email, name)
+                ],
+                contact_id=result.inserted_id
+            )
+            email_queued = True
+        except Exception as e:
+            print(f"Error queueing contact emails: {e}")
+            email_queued = False
 
         return jsonify({
             "message": "Contact form submitted successfully",
             "id": str(result.inserted_id),
-            "email_sent": notification_sent
+            "email_queued": email_queued
         }), 201
 
     except Exception as e:
@@ -52,13 +90,44 @@ def submit_contact(mail):
 @contact_bp.route('/contacts', methods=['GET'])
 def get_contacts():
     """
-    Get all contact submissions (for admin dashboard)
-    GET /api/contacts
+    Get contact submissions, newest first, with keyset pagination (for admin dashboard)
+    GET /api/contacts?limit=50&cursor=...&read=true|false
+                     &view=summary|full&fields=id,name,email
+    Returns { "contacts": [...], "next_cursor": "..." | null, "unread_count": n }.
+    Pass next_cursor back as `cursor` for the following page. limit is
+    capped at CONTACTS_MAX_LIMIT.
     """
     try:
-        contacts = list(contacts_collection.find().sort("created_at", -1))
+        try:
+            limit = parse_limit(
+                request.args.get('limit'),
+                default=50,
+                maximum=Config.CONTACTS_MAX_LIMIT
+            )
+            read = _parse_read_filter(request.args.get('read'))
+            fields = resolve_fields(ContactModel, request.args)
+
+            query = {}
+            if read is not None:
+                query['read'] = read
+            if request.args.get('cursor'):
+                query = {"$and": [query, keyset_filter('created_at', request.args['cursor'])]}
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # The cursor for the next page needs created_at and _id
+        cursor = (
+            listing_collection(contacts_collection)
+            .find(query, projection(ContactModel, fields, required=('id', 'created_at')))
+            .sort([("created_at", -1), ("_id", -1)])
+            .limit(limit + 1)
+        )
+        contacts, next_cursor = keyset_page(cursor, 'created_at', limit)
+
         return jsonify({
-            "contacts": [ContactModel.serialize(c) for c in contacts]
+            "contacts": many_serializer(ContactModel, fields)(contacts),
+            "next_cursor": next_cursor,
+            "unread_count": unread_count()
         }), 200
     except Exception as e:
         print(f"Error in get_contacts: {e}")
@@ -72,17 +141,122 @@ def mark_contact_read(contact_id):
     PATCH /api/contacts/<id>/read
     """
     try:
-        from bson import ObjectId
         result = contacts_collection.update_one(
             {"_id": ObjectId(contact_id)},
             {"$set": {"read": True}}
         )
 
         if result.modified_count:
+            incr_counter(UNREAD_CONTACTS, -1)
             return jsonify({"message": "Contact marked as read"}), 200
         else:
             return jsonify({"error": "Contact not found"}), 404
 
     except Exception as e:
         print(f"Error in mark_contact_read: {e}")
-        return jsonify({"error": "Failed to update contact"}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to update contact"}), 500
+
+
+@contact_bp.route('/contacts/read', methods=['PATCH'])
+def mark_contacts_read():
+    """
+    Mark many contacts as read in one update
+    PATCH /api/contacts/read
+    Body: { "ids": ["...", ...] } or { "before": "<cursor>" }
+    `before` takes a cursor from GET /api/contacts and marks every contact
+    older than that position.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        before = data.get('before')
+
+        query = {"read": False}
+        try:
+            if ids is not None and before is None:
+                if not isinstance(ids, list) or not ids:
+                    raise ValueError("ids must be a non-empty list")
+                if len(ids) > Config.CONTACTS_MAX_LIMIT:
+                    raise ValueError(f"At most {Config.CONTACTS_MAX_LIMIT} ids per request")
+                try:
+                    query['_id'] = {"$in": [ObjectId(contact_id) for contact_id in ids]}
+                except (InvalidId, TypeError) as e:
+                    raise ValueError("Invalid contact id") from e
+            elif before is not None and ids is None:
+                if not isinstance(before, str):
+                    raise ValueError("Invalid cursor")
+                query.update(keyset_filter('created_at', before))
+            else:
+                raise ValueError("Provide either ids or before")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        result = contacts_collection.update_many(query, {"$set": {"read": True}})
+        incr_counter(UNREAD_CONTACTS, -result.modified_count)
+
+        return jsonify({
+            "message": "Contacts marked as read",
+            "modified": result.modified_count,
+            "unread_count": unread_count()
+        }), 200
+
+    except Exception as e:
+        print(f"Error in mark_contacts_read: {e}")
+        return jsonify({"error": "Failed to update contacts"}), 500
+
+
+@contact_bp.route('/contacts/unread_count', methods=['GET'])
+def get_unread_count():
+    """
+    Number of unread contacts (for the admin dashboard badge)
+    GET /api/contacts/unread_count
+    """
+    try:
+        return jsonify({"unread_count": unread_count()}), 200
+    except Exception as e:
+        print(f"Error in get_unread_count: {e}")
+        return jsonify({"error": "Failed to count contacts"}), 500
+
+
+@contact_bp.route('/contacts/export', methods=['GET'])
+def export_contacts():
+    """
+    Stream contact submissions as NDJSON or CSV (for admin dashboard)
+    GET /api/contacts/export?format=ndjson|csv&since=...&until=...
+    """
+    try:
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+        try:
+            since = parse_datetime(request.args.get('since'))
+            until = parse_datetime(request.args.get('until'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        query = {}
+        if since or until:
+            query['created_at'] = {}
+            if since:
+                query['created_at']['$gte'] = since
+            if until:
+                query['created_at']['$lt'] = until
+
+        cursor = (
+            listing_collection(contacts_collection)
+            .find(query, ContactModel.PROJECTION)
+            .sort("created_at", 1)
+            .batch_size(Config.EXPORT_BATCH_SIZE)
+        )
+        return export_response(
+            cursor,
+            ContactModel.serialize,
+            fmt,
+            ContactModel.EXPORT_COLUMNS,
+            "contacts"
+        )
+
+    except Exception as e:
+        print(f"Error in export_contacts: {e}")
+        return jsonify({"error": "Failed to export contacts"}), 500
\ No newline at end of file
@@ -1,21 +1,60 @@
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
+from config.config import Config
 from models.models import ProjectModel
-from utils.database import projects_collection
+from utils.cache import cached
+from utils.database import listing_collection, projects_collection
+from utils.fieldsets import fieldset_key, many_serializer, projection, resolve_fields
+from utils.http_cache import cached_response, catalog_changed, conditional_get
 
 project_bp = Blueprint('project', __name__)
 
+CACHE_TAG = 'projects'
+
+
+@cached(
+    ttl_seconds=Config.CATALOG_CACHE_TTL,
+    stale_while_revalidate=Config.CATALOG_CACHE_STALE_TTL,
+    tags=(CACHE_TAG,)
+)
+def list_projects(fields=None):
+    """
+    Serialized projects in display order, optionally limited to a sparse
+    fieldset (cached until a project changes)
+    """
+    projects = (
+        listing_collection(projects_collection)
+        .find({}, projection(ProjectModel, fields))
+        .sort("order", 1)
+    )
+    return many_serializer(ProjectModel, fields)(projects)
+
+
+def warm_cache():
+    """Populate the project list cache, e.g. at worker boot"""
+    list_projects()
+
+
+def _fieldset():
+    return fieldset_key(ProjectModel, request.args)
+
 
 @project_bp.route('/projects', methods=['GET'])
+@conditional_get(CACHE_TAG, variant=_fieldset)
+@cached_response(CACHE_TAG, variant=_fieldset)
 def get_projects():
     """
     Get all projects
-    GET /api/projects
+    GET /api/projects?view=summary|full&fields=id,title
     """
     try:
-        projects = list(projects_collection.find().sort("order", 1))
+        try:
+            fields = resolve_fields(ProjectModel, request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         return jsonify({
-            "projects": [ProjectModel.serialize(p) for p in projects]
+            "projects": list_projects(fields)
         }), 200
     except Exception as e:
         print(f"Error in get_projects: {e}")
@@ -23,13 +62,14 @@ def get_projects():
 
 
 @project_bp.route('/projects/<project_id>', methods=['GET'])
+@conditional_get(CACHE_TAG, variant=lambda: request.view_args['project_id'])
 def get_project(project_id):
     """
     Get a single project by ID
     GET /api/projects/<id>
     """
     try:
-        project = projects_collection.find_one({"_id": ObjectId(project_id)})
+        project = projects_collection.find_one({"_id": ObjectId(project_id)}, ProjectModel.PROJECTION)
 
         if not project:
             return jsonify({"error": "Project not found"}), 404
@@ -77,6 +117,7 @@ def create_project():
 
         # Save to database
         result = projects_collection.insert_one(project_doc)
+        catalog_changed(CACHE_TAG)
 
         return jsonify({
             "message": "Project created successfully",
@@ -123,6 +164,7 @@ def update_project(project_id):
         )
 
         if result.matched_count:
+            catalog_changed(CACHE_TAG)
             return jsonify({"message": "Project updated successfully"}), 200
         else:
             return jsonify({"error": "Project not found"}), 404
@@ -142,6 +184,7 @@ def delete_project(project_id):
         result = projects_collection.delete_one({"_id": ObjectId(project_id)})
 
         if result.deleted_count:
+            catalog_changed(CACHE_TAG)
             return jsonify({"message": "Project deleted successfully"}), 200
         else:
             return jsonify({"error": "Project not found"}), 404
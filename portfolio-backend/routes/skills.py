@@ -1,35 +1,77 @@
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
+from config.config import Config
 from models.models import SkillModel
-from utils.database import skills_collection
+from utils.cache import cached
+from utils.database import listing_collection, skills_collection
+from utils.fieldsets import fieldset_key, many_serializer, projection, resolve_fields, serializer
+from utils.http_cache import cached_response, catalog_changed, conditional_get
 
 skill_bp = Blueprint('skill', __name__)
 
+CACHE_TAG = 'skills'
+
+
+@cached(
+    ttl_seconds=Config.CATALOG_CACHE_TTL,
+    stale_while_revalidate=Config.CATALOG_CACHE_STALE_TTL,
+    tags=(CACHE_TAG,)
+)
+def list_skills(grouped=False, fields=None):
+    """
+    Serialized skills, optionally grouped by category and/or limited to a
+    sparse fieldset (cached until a skill changes)
+    """
+    required = ('category',) if grouped else ()
+    skills = listing_collection(skills_collection).find({}, projection(SkillModel, fields, required))
+    if not grouped:
+        return many_serializer(SkillModel, fields)(skills)
+
+    # Group skills by category
+    serialize = serializer(SkillModel, fields)
+    grouped_skills = {}
+    for skill in skills:
+        category = skill['category']
+        if category not in grouped_skills:
+            grouped_skills[category] = []
+        grouped_skills[category].append(serialize(skill))
+    return grouped_skills
+
+
+def warm_cache():
+    """Populate both full skill list variants, e.g. at worker boot"""
+    list_skills(False)
+    list_skills(True)
+
+
+def _normalize_grouped(value):
+    return 'true' if (value or 'false').lower() == 'true' else 'false'
+
+
+def _grouped_variant():
+    return 'grouped' if _normalize_grouped(request.args.get('grouped')) == 'true' else 'flat'
+
+
+def _fieldset():
+    return fieldset_key(SkillModel, request.args)
+
 
 @skill_bp.route('/skills', methods=['GET'])
+@conditional_get(CACHE_TAG, variant=lambda: f"{_grouped_variant()}-{_fieldset()}")
+@cached_response(CACHE_TAG, params={'grouped': _normalize_grouped}, variant=_fieldset)
 def get_skills():
     """
     Get all skills, optionally grouped by category
-    GET /api/skills?grouped=true
+    GET /api/skills?grouped=true&view=summary|full&fields=id,name
     """
     try:
-        grouped = request.args.get('grouped', 'false').lower() == 'true'
-
-        skills = list(skills_collection.find())
-        serialized_skills = [SkillModel.serialize(s) for s in skills]
+        grouped = _grouped_variant() == 'grouped'
+        try:
+            fields = resolve_fields(SkillModel, request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        if grouped:
-            # Group skills by category
-            grouped_skills = {}
-            for skill in serialized_skills:
-                category = skill['category']
-                if category not in grouped_skills:
-                    grouped_skills[category] = []
-                grouped_skills[category].append(skill)
-
-            return jsonify({"skills": grouped_skills}), 200
-        else:
-            return jsonify({"skills": serialized_skills}), 200
+        return jsonify({"skills": list_skills(grouped, fields)}), 200
 
     except Exception as e:
         print(f"Error in get_skills: {e}")
@@ -37,13 +79,14 @@ def get_skills():
 
 
 @skill_bp.route('/skills/<skill_id>', methods=['GET'])
+@conditional_get(CACHE_TAG, variant=lambda: request.view_args['skill_id'])
 def get_skill(skill_id):
     """
     Get a single skill by ID
     GET /api/skills/<id>
     """
     try:
-        skill = skills_collection.find_one({"_id": ObjectId(skill_id)})
+        skill = skills_collection.find_one({"_id": ObjectId(skill_id)}, SkillModel.PROJECTION)
 
         if not skill:
             return jsonify({"error": "Skill not found"}), 404
@@ -88,6 +131,7 @@ def create_skill():
 
         # Save to database
         result = skills_collection.insert_one(skill_doc)
+        catalog_changed(CACHE_TAG)
 
         return jsonify({
             "message": "Skill created successfully",
@@ -132,6 +176,7 @@ def update_skill(skill_id):
         )
 
         if result.matched_count:
+            catalog_changed(CACHE_TAG)
             return jsonify({"message": "Skill updated successfully"}), 200
         else:
             return jsonify({"error": "Skill not found"}), 404
@@ -151,6 +196,7 @@ def delete_skill(skill_id):
         result = skills_collection.delete_one({"_id": ObjectId(skill_id)})
 
         if result.deleted_count:
+            catalog_changed(CACHE_TAG)
             return jsonify({"message": "Skill deleted successfully"}), 200
         else:
             return jsonify({"error": "Skill not found"}), 404
@@ -191,6 +237,7 @@ def create_skills_batch():
 
         # Insert all at once
         result = skills_collection.insert_many(skill_docs)
+        catalog_changed(CACHE_TAG)
 
         return jsonify({
             "message": f"Successfully created {len(result.inserted_ids)} skills",
@@ -4,6 +4,7 @@ Run this after setting up your MongoDB connection
 """
 
 from utils.database import projects_collection, skills_collection
+from utils.http_cache import catalog_changed
 from models.models import ProjectModel, SkillModel
 
 
@@ -124,6 +125,10 @@ if __name__ == "__main__":
         seed_projects()
         seed_skills()
 
+        # Bump catalog versions and drop lists cached by running workers
+        catalog_changed('projects')
+        catalog_changed('skills')
+
         print("\n" + "=" * 50)
         print("✓ Database seeding completed!")
         print("=" * 50 + "\n")
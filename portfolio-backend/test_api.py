@@ -110,7 +110,29 @@ def test_analytics_track():
         headers={"Content-Type": "application/json"}
     )
     print(f"Project click tracking - Status: {response.status_code}")
-    return response.status_code == 201
+    return response.status_code == 202
+
+
+def test_analytics_track_batch():
+    """Test batch analytics tracking"""
+    print("\n7b. Testing POST /api/analytics/track/batch...")
+    batch_data = {
+        "events": [
+            {"type": "page_view", "page": "/projects"},
+            {"type": "project_click", "project_id": "test123", "project_title": "Test Project"},
+            {"type": "unknown"}
+        ]
+    }
+    # Sent as text/plain, the way navigator.sendBeacon posts it
+    response = requests.post(
+        f"{BASE_URL}/api/analytics/track/batch",
+        data=json.dumps(batch_data),
+        headers={"Content-Type": "text/plain"}
+    )
+    print(f"Status: {response.status_code}")
+    print(f"Response: {response.json()}")
+    data = response.json()
+    return response.status_code == 202 and data.get('accepted') == 2 and data.get('rejected') == 1
 
 
 def test_analytics_dashboard():
@@ -142,6 +164,7 @@ def run_all_tests():
         results.append(("Get Skills", test_get_skills()))
         results.append(("Contact Form", test_contact_form()))
         results.append(("Analytics Tracking", test_analytics_track()))
+        results.append(("Analytics Batch Tracking", test_analytics_track_batch()))
         results.append(("Analytics Dashboard", test_analytics_dashboard()))
 
     except requests.exceptions.ConnectionError:
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import mongomock
+import pymongo
+import pytest
+
+# Tests import the backend modules directly and never need a bus or L2
+os.environ.setdefault('CACHE_BUS', 'none')
+os.environ.setdefault('CACHE_L2_BACKEND', 'none')
+os.environ.setdefault('ANALYTICS_SPOOL_DIR', '')
+os.environ.setdefault('OUTBOX_WORKERS', '0')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# utils.database_optimized connects on import; give it an in-memory server
+_mongo = mongomock.MongoClient()
+pymongo.MongoClient = lambda *args, **kwargs: _mongo
+
+
+@pytest.fixture
+def db():
+    """The app's database, emptied before each test"""
+    from utils.database_optimized import db_manager
+
+    db_manager.get_collection('contacts')
+    for name in db_manager.db.list_collection_names():
+        db_manager.db.drop_collection(name)
+    return db_manager.db
@@ -0,0 +1,35 @@
+from flask import Flask
+
+from routes.analytics import analytics_bp
+
+
+def _client():
+    app = Flask(__name__)
+    app.register_blueprint(analytics_bp, url_prefix='/api')
+    return app.test_client()
+
+
+def test_batch_with_every_event_rejected_is_a_bad_request(db):
+    response = _client().post('/api/analytics/track/batch', json={
+        "events": [{"type": "bogus"}, {"type": "project_click"}]
+    })
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body["accepted"] == 0
+    assert body["rejected"] == 2
+    assert all(r["status"] == "rejected" and r["error"] for r in body["results"])
+
+
+def test_visitor_id_ignores_client_supplied_address_headers():
+    from routes.analytics import _request_visitor_id
+
+    app = Flask(__name__)
+    ids = set()
+    for forged in ("10.0.0.1", "10.0.0.2"):
+        with app.test_request_context(
+            headers={"X-Real-IP": forged, "X-Forwarded-For": forged, "User-Agent": "test"},
+            environ_base={"REMOTE_ADDR": "203.0.113.7"}
+        ):
+            ids.add(_request_visitor_id())
+    assert len(ids) == 1
@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import mongomock
+from bson import ObjectId
+
+from utils.analytics_buffer import AnalyticsWriteBuffer
+from utils.analytics_rollup import ROLLUP_COLLECTION
+from utils.database_optimized import db_manager
+from utils.spool import DiskSpool
+
+
+def _events(n):
+    now = datetime.utcnow().replace(microsecond=0)
+    return [
+        {"_id": ObjectId(), "type": "page_view", "page": "/", "timestamp": now, "visitor_id": f"v{i}"}
+        for i in range(n)
+    ]
+
+
+def _rollup_total(db):
+    return sum(doc["count"] for doc in db[ROLLUP_COLLECTION].find())
+
+
+def test_replaying_a_segment_twice_is_idempotent(db, tmp_path, monkeypatch):
+    # A time-series collection has no unique _id index to reject re-inserts
+    monkeypatch.setattr(db_manager, "analytics_timeseries", True)
+    inserted = []
+    insert_many = mongomock.collection.Collection.insert_many
+
+    def recording_insert_many(self, documents, *args, **kwargs):
+        documents = list(documents)
+        inserted.extend(doc["_id"] for doc in documents)
+        return insert_many(self, documents, *args, **kwargs)
+
+    monkeypatch.setattr(mongomock.collection.Collection, "insert_many", recording_insert_many)
+
+    spool = DiskSpool(str(tmp_path))
+    buffer = AnalyticsWriteBuffer(collection_name="analytics_replay_test", batch_size=3, spool=spool)
+    events = _events(5)
+    spool.append(events)
+    spool.rotate()
+    # Keep a copy so the same segment can be replayed again, as after a
+    # release() mid-replay
+    segment = spool.claim_segments()[0]
+    with open(segment, "rb") as f:
+        data = f.read()
+    spool.release(segment)
+
+    buffer.replay()
+    assert db["analytics_replay_test"].count_documents({}) == 5
+    assert _rollup_total(db) == 5
+
+    (tmp_path / "segment-1-1.log").write_bytes(data)
+    buffer.replay()
+    assert db["analytics_replay_test"].count_documents({}) == 5
+    assert _rollup_total(db) == 5
+    assert sorted(inserted) == sorted(event["_id"] for event in events)
+    assert spool.pending_segments() == 0
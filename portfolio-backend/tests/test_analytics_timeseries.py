@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from routes.analytics import _dashboard_from_raw
+from utils.analytics_rollup import hour_floor, window_counts
+from utils.database_optimized import db_manager
+
+
+def _meta_only_events(collection):
+    """Events whose type/page/project_id live only in meta, so top-level reads find nothing"""
+    # Mid-hour, so window_counts() reads them from raw events rather than rollups
+    now = hour_floor(datetime.utcnow()) - timedelta(minutes=30)
+    events = [
+        {"type": "page_view", "page": "/", "timestamp": now},
+        {"type": "page_view", "page": "/about", "timestamp": now},
+        {"type": "project_click", "project_id": "p1", "project_title": "P1", "timestamp": now}
+    ]
+    for event in events:
+        db_manager.with_analytics_meta(event)
+        for name in ("type", "page", "project_id"):
+            event.pop(name, None)
+    collection.insert_many(events)
+    return now
+
+
+def test_timeseries_queries_read_meta_fields(db, monkeypatch):
+    monkeypatch.setattr(db_manager, "analytics_timeseries", True)
+    collection = db[db_manager.analytics_collection_name]
+    timestamp = _meta_only_events(collection)
+
+    dashboard = _dashboard_from_raw(datetime.utcnow() - timedelta(days=1), collection)
+    assert dashboard["total_page_views"] == 2
+    assert dashboard["total_project_clicks"] == 1
+    assert {row["page"] for row in dashboard["page_views_by_page"]} == {"/", "/about"}
+    assert dashboard["popular_projects"][0]["project_id"] == "p1"
+
+    counts = window_counts(timestamp - timedelta(minutes=1), hour_floor(datetime.utcnow()))
+    assert {(event_type, key) for event_type, key, _ in counts} == {
+        ("page_view", "/"), ("page_view", "/about"), ("project_click", "p1")
+    }
+
+
+def test_timeseries_indexes_use_meta_paths(db):
+    collection = db["analytics_ts_index_test"]
+    db_manager.create_analytics_indexes(collection, timeseries=True)
+
+    keys = [[field for field, _ in index["key"]] for index in collection.index_information().values()]
+    assert ["meta.type", "timestamp", "_id"] in keys
+    assert ["meta.page", "timestamp", "_id"] in keys
+    assert ["meta.project_id", "timestamp", "_id"] in keys
+    assert not any(field in key for key in keys for field in ("type", "page", "project_id"))
@@ -0,0 +1,177 @@
+import pytest
+
+from utils.cache import CacheManager, TieredCache
+from utils.cache_backends import SQLiteCacheBackend
+from utils.cache_bus import LocalBus
+
+
+def _workers(tmp_path):
+    """Two workers' caches sharing one SQLite L2 and one bus"""
+    l2_path = str(tmp_path / "cache.sqlite3")
+    bus = LocalBus()
+    a = TieredCache(CacheManager(), SQLiteCacheBackend(l2_path), bus)
+    b = TieredCache(CacheManager(), SQLiteCacheBackend(l2_path), bus)
+    return a, b
+
+
+def test_l2_hit_keeps_tags(tmp_path):
+    a, b = _workers(tmp_path)
+    a.set("projects:list", ["old"], 3600, tags=("projects",))
+
+    # B fills its L1 from L2
+    assert b.get("projects:list") == ["old"]
+
+    a.invalidate_tag("projects")
+
+    assert b.get("projects:list") is None
+    assert a.get("projects:list") is None
+
+
+def test_l2_hit_tags_survive_local_invalidation(tmp_path):
+    a, b = _workers(tmp_path)
+    a.set("skills:list", ["old"], 3600, tags=("skills",))
+    assert b.get("skills:list") == ["old"]
+
+    assert b.invalidate_tag("skills") == 1
+    assert b.get("skills:list") is None
+
+
+def test_cached_key_ignores_how_defaults_are_passed():
+    from utils.cache import cache_manager, cached
+
+    calls = []
+
+    @cached(ttl_seconds=60)
+    def listing(grouped=False, fields=None):
+        calls.append((grouped, fields))
+        return [grouped, fields]
+
+    cache_manager.clear()
+    listing()
+    listing(False, None)
+    listing(grouped=False)
+    listing(fields=None)
+    assert calls == [(False, None)]
+
+    listing(True)
+    assert calls == [(False, None), (True, None)]
+
+
+def test_single_flight_one_backend_call_per_expiry():
+    import threading
+    import time
+
+    from utils.cache import cache_manager, cached
+
+    calls = []
+
+    @cached(ttl_seconds=0.5, single_flight=True)
+    def dashboard(days):
+        calls.append(days)
+        time.sleep(0.1)  # slow aggregation
+        return {"days": days}
+
+    def stampede():
+        barrier = threading.Barrier(100)
+        results = []
+
+        def caller():
+            barrier.wait()
+            results.append(dashboard(30))
+
+        threads = [threading.Thread(target=caller) for _ in range(100)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    cache_manager.clear()
+    results = stampede()
+    assert len(calls) == 1
+    assert results == [{"days": 30}] * 100
+
+    time.sleep(0.6)  # let the entry expire
+    stampede()
+    assert len(calls) == 2
+
+
+def test_lock_release_only_by_its_owner(tmp_path):
+    import time
+
+    a, b = _workers(tmp_path)
+    token_a = a.acquire_lock("dashboard", 0.1)
+    assert token_a is not None
+    assert b.acquire_lock("dashboard", 0.1) is None
+
+    time.sleep(0.2)  # A's lock expires while A is still computing
+    token_b = b.acquire_lock("dashboard", 30)
+    assert token_b is not None
+
+    # A finishing late must not release B's lock
+    a.release_lock("dashboard", token_a)
+    assert a.acquire_lock("dashboard", 30) is None
+
+    b.release_lock("dashboard", token_b)
+    assert a.acquire_lock("dashboard", 30) is not None
+
+
+def test_stale_while_revalidate_serves_stale_and_refreshes_once():
+    import threading
+    import time
+
+    from utils.cache import cache_manager, cached
+
+    calls = []
+    refreshing = threading.Event()
+    finish_refresh = threading.Event()
+
+    @cached(ttl_seconds=0.2, stale_while_revalidate=30)
+    def catalog():
+        calls.append(1)
+        if len(calls) > 1:
+            refreshing.set()
+            finish_refresh.wait(5)
+        return len(calls)
+
+    cache_manager.clear()
+    assert catalog() == 1
+    time.sleep(0.3)  # past the TTL, inside the stale window
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(catalog())) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert results == [1] * 20  # served stale without waiting on the refresh
+
+    assert refreshing.wait(5)
+    finish_refresh.set()
+    deadline = time.monotonic() + 5
+    while catalog() != 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert catalog() == 2
+    assert len(calls) == 2
+
+
+def test_redis_delete_tag_removes_entries_and_their_tag_sets(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis runs Lua scripts through lupa
+    import redis
+
+    from utils.cache_backends import RedisCacheBackend
+
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(redis.Redis, "from_url", lambda url, **kwargs: client)
+    backend = RedisCacheBackend("redis://localhost")
+    backend.set("projects:list", ["p"], 60, ("projects",))
+    backend.set("catalog", ["p", "s"], 60, ("projects", "skills"))
+    backend.set("skills:list", ["s"], 60, ("skills",))
+
+    assert backend.delete_tag("projects") == 2
+
+    assert backend.get("projects:list") is None
+    assert backend.get("catalog") is None
+    assert backend.get("skills:list")[0] == ["s"]
+    assert not client.exists(backend._tag_key("projects"), backend._entry_tags_key("catalog"))
@@ -0,0 +1,64 @@
+from flask import Flask
+
+from routes.contact import contact_bp
+from utils.counters import COUNTERS_COLLECTION, UNREAD_CONTACTS, count_unread_contacts, get_counter, seed_counter
+
+
+def _client():
+    app = Flask(__name__)
+    app.register_blueprint(contact_bp, url_prefix='/api')
+    return app.test_client()
+
+
+def _counter(db):
+    return db[COUNTERS_COLLECTION].find_one({"_id": UNREAD_CONTACTS})["count"]
+
+
+def _submit(client, n):
+    ids = []
+    for i in range(n):
+        response = client.post('/api/contact', json={
+            "name": f"Visitor {i}", "email": f"visitor{i}@example.com", "message": "Hello"
+        })
+        assert response.status_code == 201
+        ids.append(response.get_json()["id"])
+    return ids
+
+
+def test_seeding_counts_existing_contacts_once(db):
+    db.contacts.insert_many([{"read": False}, {"read": False}, {"read": True}])
+
+    assert seed_counter(UNREAD_CONTACTS, count_unread_contacts) == 2
+    db.contacts.insert_one({"read": False})
+    # Already seeded: a second seeder must not add the count again
+    assert seed_counter(UNREAD_CONTACTS, count_unread_contacts) == 2
+
+
+def test_counter_follows_inserts_and_mark_read(db):
+    seed_counter(UNREAD_CONTACTS, count_unread_contacts)
+    client = _client()
+
+    ids = _submit(client, 4)
+    assert _counter(db) == 4
+
+    assert client.patch(f'/api/contacts/{ids[0]}/read').status_code == 200
+    assert client.patch(f'/api/contacts/{ids[0]}/read').status_code == 404
+    assert _counter(db) == 3
+
+    response = client.patch('/api/contacts/read', json={"ids": ids[:3]})
+    assert response.get_json()["modified"] == 2
+    assert response.get_json()["unread_count"] == 1
+    assert _counter(db) == count_unread_contacts() == 1
+
+
+def test_reconcile_counters_command_overwrites_drift(db):
+    from app_enhanced import app
+
+    db.contacts.insert_many([{"read": False}, {"read": False}])
+    seed_counter(UNREAD_CONTACTS, count_unread_contacts)
+    db[COUNTERS_COLLECTION].update_one({"_id": UNREAD_CONTACTS}, {"$set": {"count": 7}})
+
+    result = app.test_cli_runner().invoke(args=['reconcile-counters'])
+
+    assert f"{UNREAD_CONTACTS}: 7 -> 2" in result.output
+    assert get_counter(UNREAD_CONTACTS, count_unread_contacts) == 2
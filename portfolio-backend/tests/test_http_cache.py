@@ -0,0 +1,62 @@
+import pytest
+from flask import Flask, jsonify
+
+from utils import http_cache
+from utils.cache import cache_manager
+from utils.http_cache import cached_response, catalog_changed, get_stamp, seed_stamps
+
+
+def _app(rows):
+    app = Flask(__name__)
+
+    @app.route('/items')
+    @cached_response('items')
+    def items():
+        return jsonify({"items": list(rows)})
+
+    return app
+
+
+def test_stamp_read_before_a_write_is_not_kept(db, monkeypatch):
+    cache_manager.clear()
+    seed_stamps(('items',))
+    load_stamp = http_cache._load_stamp
+    loads = []
+
+    def load_then_write(name):
+        stamp = load_stamp(name)
+        loads.append(stamp["version"])
+        if len(loads) == 1:
+            # Another request writes between our read and our cache set
+            catalog_changed(name)
+        return stamp
+
+    monkeypatch.setattr(http_cache, "_load_stamp", load_then_write)
+    assert get_stamp('items')["version"] == 2
+    monkeypatch.setattr(http_cache, "_load_stamp", load_stamp)
+    assert get_stamp('items')["version"] == 2
+
+
+def test_stamp_reads_do_not_write(db):
+    cache_manager.clear()
+    with pytest.raises(LookupError):
+        get_stamp('items')
+    assert db[http_cache.VERSION_COLLECTION].count_documents({}) == 0
+
+
+def test_response_cache_is_keyed_on_the_stamp(db):
+    cache_manager.clear()
+    seed_stamps(('items',))
+    rows = ["a"]
+    client = _app(rows).test_client()
+    assert client.get('/items').get_json() == {"items": ["a"]}
+
+    # A body rendered before the write, stored after its invalidation
+    rows.append("b")
+    stale_key = f"response:/items?@{get_stamp('items')['version']}"
+    entry = cache_manager.get(stale_key)
+    assert entry is not None
+    catalog_changed('items')
+    cache_manager.set(stale_key, entry, 3600, tags=('items',))
+
+    assert client.get('/items').get_json() == {"items": ["a", "b"]}
@@ -0,0 +1,46 @@
+import pytest
+
+from utils.hyperloglog import HyperLogLog, visitor_fingerprint
+
+# 1.04 / sqrt(4096) ~= 1.6% standard error at the default precision;
+# allow three standard errors
+TOLERANCE = 3 * 1.04 / 64
+
+
+@pytest.mark.parametrize("exact", [10, 1000, 10000, 100000])
+def test_estimate_close_to_exact_count(exact):
+    sketch = HyperLogLog()
+    for i in range(exact):
+        sketch.add(f"visitor-{i}")
+        sketch.add(f"visitor-{i}")  # repeats don't count
+
+    assert abs(sketch.count() - exact) <= max(1, exact * TOLERANCE)
+
+
+def test_merge_matches_single_sketch():
+    monday, tuesday, both = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    for i in range(5000):
+        monday.add(f"visitor-{i}")
+        both.add(f"visitor-{i}")
+    for i in range(2500, 8000):
+        tuesday.add(f"visitor-{i}")
+        both.add(f"visitor-{i}")
+
+    monday.merge(tuesday)
+    assert monday.registers == both.registers
+    assert abs(monday.count() - 8000) <= 8000 * TOLERANCE
+
+
+def test_sparse_round_trip():
+    sketch = HyperLogLog()
+    for i in range(300):
+        sketch.add(str(i))
+    assert HyperLogLog.from_sparse(sketch.to_sparse()).registers == sketch.registers
+
+
+def test_visitor_fingerprint_is_keyed():
+    ua = "Mozilla/5.0"
+    first = visitor_fingerprint("203.0.113.7", ua, "secret-a")
+    assert first == visitor_fingerprint("203.0.113.7", ua, "secret-a")
+    assert first != visitor_fingerprint("203.0.113.7", ua, "secret-b")
+    assert first != visitor_fingerprint("203.0.113.8", ua, "secret-a")
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from models.models import AnalyticsModel, ProjectModel, build_serializers
+from utils.fieldsets import serializer
+
+
+def test_serializer_follows_schema_order_and_defaults():
+    doc = {"_id": ObjectId(), "title": "T", "description": "D", "tech_stack": ["x"], "created_at": datetime.utcnow()}
+    out = ProjectModel.serialize(doc)
+    assert list(out) == list(ProjectModel.FIELDS)
+    assert out["id"] == doc["_id"]
+    assert out["order"] == 999
+    assert out["github_link"] is None
+
+
+def test_missing_required_field_raises():
+    serialize, _ = build_serializers({"id": "_id", "name": "name"})
+    with pytest.raises(KeyError):
+        serialize({"_id": 1})
+
+
+def test_omit_missing_leaves_fields_out():
+    click = {"_id": ObjectId(), "type": "project_click", "project_id": "p1", "timestamp": datetime.utcnow()}
+    assert set(AnalyticsModel.serialize(click)) == {"id", "type", "project_id", "timestamp"}
+    # The visitor fingerprint only appears in exports
+    assert "visitor_id" not in AnalyticsModel.serialize({**click, "visitor_id": "v"})
+    assert AnalyticsModel.serialize_export({**click, "visitor_id": "v"})["visitor_id"] == "v"
+
+
+def test_sparse_fieldset_serializer():
+    doc = {"_id": ObjectId(), "title": "T"}
+    assert serializer(ProjectModel, ("title", "image_url"))(doc) == {"title": "T", "image_url": None}
@@ -0,0 +1,156 @@
+import socket
+import time
+from datetime import datetime
+
+import pytest
+from aiosmtpd.controller import Controller
+from flask import Flask
+from flask_mail import Mail
+
+from utils.email import SMTPSession
+from utils.outbox import DEAD, PENDING, SENT, EmailOutbox
+
+
+class Sink:
+    """aiosmtpd handler that records messages, rejecting the first `reject`"""
+
+    def __init__(self):
+        self.messages = []
+        self.reject = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.reject:
+            self.reject -= 1
+            return "451 Try again later"
+        self.messages.append(envelope.content)
+        return "250 OK"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def sink():
+    handler = Sink()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield handler, controller.port
+    controller.stop()
+
+
+def _outbox(port, **kwargs):
+    app = Flask(__name__)
+    app.config.update(
+        MAIL_SERVER="127.0.0.1",
+        MAIL_PORT=port,
+        MAIL_USE_TLS=False,
+        MAIL_DEFAULT_SENDER="site@example.com"
+    )
+    outbox = EmailOutbox(collection_name="outbox_test", workers=0, **kwargs)
+    outbox.init_app(app, Mail(app))
+    return outbox
+
+
+def _email(n=0):
+    return {"subject": f"hello {n}", "recipients": ["owner@example.com"], "body": "hi"}
+
+
+def test_delivers_over_one_connection(db, sink):
+    handler, port = sink
+    outbox = _outbox(port)
+    outbox.enqueue([_email(n) for n in range(3)])
+
+    session = SMTPSession(outbox.mail)
+    while outbox.process_one(session):
+        pass
+    session.close()
+
+    assert len(handler.messages) == 3
+    assert session.opened == 1
+    assert outbox.collection.count_documents({"status": SENT}) == 3
+
+
+def test_failed_delivery_is_retried_after_backoff(db, sink):
+    handler, port = sink
+    handler.reject = 1
+    outbox = _outbox(port, backoff_base=0.2)
+    outbox.enqueue([_email()])
+
+    assert outbox.process_one()
+    doc = outbox.collection.find_one()
+    assert doc["status"] == PENDING
+    assert doc["attempts"] == 1
+    assert "451" in doc["last_error"]
+    assert doc["next_attempt_at"] > datetime.utcnow()
+
+    # Not due until the backoff has passed
+    assert not outbox.process_one()
+    time.sleep(0.3)
+    assert outbox.process_one()
+    assert outbox.collection.find_one()["status"] == SENT
+    assert len(handler.messages) == 1
+
+
+def test_message_is_dead_lettered_after_max_attempts(db, sink):
+    handler, port = sink
+    handler.reject = 10
+    outbox = _outbox(port, max_attempts=3, backoff_base=0.001)
+    outbox.enqueue([_email()])
+
+    for _ in range(3):
+        time.sleep(0.01)
+        assert outbox.process_one()
+
+    doc = outbox.collection.find_one()
+    assert doc["status"] == DEAD
+    assert doc["attempts"] == 3
+    assert not outbox.process_one()
+    assert handler.messages == []
+
+
+def test_expired_lease_is_taken_over(db, sink):
+    handler, port = sink
+    outbox = _outbox(port, lease_seconds=0.2)
+    outbox.enqueue([_email()])
+
+    # A worker claims the message and dies before sending it
+    assert outbox.claim() is not None
+    assert not outbox.process_one()
+
+    time.sleep(0.25)
+    assert outbox.process_one()
+    doc = outbox.collection.find_one()
+    assert doc["status"] == SENT
+    assert doc["attempts"] == 2
+    assert len(handler.messages) == 1
+
+
+def test_hung_server_fails_before_the_lease_expires(db):
+    # Accepts connections but never sends a greeting
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    outbox = _outbox(server.getsockname()[1], lease_seconds=0.8, smtp_timeout=30)
+    outbox.enqueue([_email()])
+
+    started = time.monotonic()
+    assert outbox.process_one(SMTPSession(outbox.mail, timeout=outbox.smtp_timeout))
+    assert time.monotonic() - started < 0.8
+    assert outbox.collection.find_one()["status"] == PENDING
+    server.close()
+
+
+def test_failed_delivery_does_not_fail_the_app_context(db, sink):
+    handler, port = sink
+    handler.reject = 1
+    outbox = _outbox(port)
+    teardown_errors = []
+    outbox.app.teardown_appcontext(teardown_errors.append)
+    outbox.enqueue([_email()])
+
+    assert outbox.process_one()
+    assert outbox.collection.find_one()["status"] == PENDING
+    assert teardown_errors == [None]
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+
+from utils.spool import DiskSpool
+
+
+def _records(spool, paths):
+    return [doc["n"] for path in paths for chunk in spool.read_segment(path) for doc in chunk]
+
+
+def test_orphan_with_reused_pid_is_recovered(tmp_path):
+    # A segment left by a killed worker whose PID now belongs to us
+    writer = DiskSpool(str(tmp_path))
+    writer.append([{"n": 1}, {"n": 2}])
+    os.close(writer._fd)  # the process died: the kernel drops its lock
+    writer._fd = None
+    assert os.path.basename(writer._path).endswith(f"-{os.getpid()}.open")
+
+    replayer = DiskSpool(str(tmp_path))
+    claimed = replayer.claim_segments()
+    assert _records(replayer, claimed) == [1, 2]
+    for path in claimed:
+        replayer.finish(path)
+    assert replayer.pending_segments() == 0
+
+
+def test_live_writer_segment_is_left_alone(tmp_path):
+    writer = DiskSpool(str(tmp_path))
+    writer.append([{"n": 1}])
+
+    replayer = DiskSpool(str(tmp_path))
+    assert replayer.claim_segments() == []
+
+    writer.rotate()
+    claimed = replayer.claim_segments()
+    assert _records(replayer, claimed) == [1]
+
+
+def test_claimed_segment_of_dead_replayer_is_recovered(tmp_path):
+    writer = DiskSpool(str(tmp_path))
+    writer.append([{"n": 1}])
+    writer.rotate()
+
+    # Another process claims the segment and dies mid-replay
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from utils.spool import DiskSpool;"
+        "assert DiskSpool(sys.argv[2]).claim_segments()"
+    )
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", script, backend, str(tmp_path)], check=True)
+
+    replayer = DiskSpool(str(tmp_path))
+    claimed = replayer.claim_segments()
+    assert _records(replayer, claimed) == [1]
+
+    # While we hold the claim, nobody else can take it back
+    assert DiskSpool(str(tmp_path)).claim_segments() == []
+
+
+def test_unsynced_write_is_fsynced_within_the_interval(tmp_path, monkeypatch):
+    import time
+
+    synced = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (synced.append(fd), fsync(fd)))
+
+    spool = DiskSpool(str(tmp_path), fsync_interval=0.2)
+    spool.append([{"n": 1}])
+    spool.append([{"n": 2}])
+    assert synced == []  # both inside the interval, nobody calls sync()
+
+    time.sleep(0.4)
+    assert synced == [spool._fd]
+    assert not spool._dirty
@@ -0,0 +1,321 @@
+"""
+In-process write buffer for analytics events
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from bson import ObjectId
+from pymongo import WriteConcern
+from pymongo.errors import BulkWriteError, ConnectionFailure
+
+from config.config import Config
+from utils.database_optimized import db_manager
+from utils.analytics_rollup import apply_rollups
+from utils.sampling import analytics_sampler
+from utils.spool import DiskSpool
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+class AnalyticsWriteBuffer:
+    """
+    Bounded queue of analytics events drained by a background thread.
+
+    Events are written with insert_many(ordered=False) once a batch reaches
+    batch_size or the oldest queued event is flush_interval seconds old.
+    When the queue is full, submit() waits up to put_timeout seconds and then
+    drops the event, counting it in the "dropped" stat.
+
+    With a DiskSpool configured, batches that fail with a connection error
+    (and overflow from a full queue) go to disk instead, the buffer is marked
+    degraded and later batches are spooled without touching MongoDB. A
+    replayer thread pings the database and, once it answers, drains the
+    spool back with bulk inserts.
+    """
+
+    def __init__(self, collection_name='analytics', max_size=10000, batch_size=500,
+                 flush_interval=2.0, put_timeout=0, spool=None, replay_interval=5.0):
+        self.collection_name = collection_name
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.spool = spool
+        self.replay_interval = replay_interval
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._replayer = None
+        self._degraded = threading.Event()
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "flushes": 0,
+            "spooled": 0,
+            "replayed": 0
+        }
+
+    def _incr(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _ensure_started(self):
+        """Start the drain thread, restarting it in forked worker processes"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+
+            if self._pid is not None and self._pid != os.getpid():
+                # Threads do not survive fork(); start clean in the child
+                self._queue = queue.Queue(maxsize=self.max_size)
+                self._stop = threading.Event()
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="analytics-write-buffer",
+                daemon=True
+            )
+            self._thread.start()
+
+            if self.spool is not None:
+                self._replayer = threading.Thread(
+                    target=self._replay_loop,
+                    name="analytics-spool-replayer",
+                    daemon=True
+                )
+                self._replayer.start()
+
+    def submit(self, event_doc):
+        """
+        Queue an event for writing
+        Returns:
+            bool: True if queued, False if dropped because the buffer is full
+        """
+        self._ensure_started()
+        try:
+            if self.put_timeout > 0:
+                self._queue.put(event_doc, timeout=self.put_timeout)
+            else:
+                self._queue.put_nowait(event_doc)
+        except queue.Full:
+            # Spill to disk rather than drop while the database is behind
+            if self.spool is not None and self._spool([event_doc]):
+                return True
+            self._incr("dropped")
+            return False
+
+        self._incr("enqueued")
+        return True
+
+    def submit_many(self, event_docs):
+        """
+        Queue several events, e.g. from a batch request
+        Returns:
+            list: one bool per event, False where the event was dropped
+        """
+        return [self.submit(event_doc) for event_doc in event_docs]
+
+    def _collect_batch(self):
+        """Block for the first event, then gather until size or age threshold"""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain_nowait(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._write(batch)
+
+    def _insert(self, batch, skip_existing=False):
+        """
+        Insert a batch with a single unordered bulk insert
+        Args:
+            skip_existing (bool): drop events whose _id is already stored first.
+                Replays need this: a time-series collection has no unique _id
+                index to reject events written before a failure.
+        Raises:
+            ConnectionFailure: if the database is unreachable
+        """
+        collection = db_manager.get_collection(self.collection_name)
+        if collection is None:
+            raise ConnectionFailure("database unavailable")
+
+        if skip_existing:
+            existing = db_manager.existing_event_ids(collection, batch)
+            batch = [event_doc for event_doc in batch if event_doc["_id"] not in existing]
+            if not batch:
+                return
+
+        if db_manager.analytics_timeseries:
+            for event_doc in batch:
+                db_manager.with_analytics_meta(event_doc)
+
+        # Page-view beacons don't need majority acknowledgement
+        collection = collection.with_options(write_concern=WriteConcern(w=1))
+        try:
+            started = time.monotonic()
+            collection.insert_many(batch, ordered=False)
+            analytics_sampler.observe_latency((time.monotonic() - started) * 1000)
+            self._incr("written", len(batch))
+            apply_rollups(batch)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            failed_indexes = {err["index"] for err in errors}
+            # Duplicate keys mean the event was already written by an earlier replay
+            failed = sum(1 for err in errors if err.get("code") != DUPLICATE_KEY)
+            inserted = [doc for i, doc in enumerate(batch) if i not in failed_indexes]
+            self._incr("written", len(inserted))
+            self._incr("failed", failed)
+            apply_rollups(inserted)
+            if failed:
+                logger.error(f"Analytics buffer: bulk insert partially failed: {e}")
+        finally:
+            self._incr("flushes")
+
+    def _spool(self, batch):
+        """Persist events locally for later replay"""
+        if self.spool is None:
+            self._incr("failed", len(batch))
+            logger.error(f"Analytics buffer: no spool configured, {len(batch)} events lost")
+            return False
+        for event_doc in batch:
+            # Fixed ids make replays idempotent
+            event_doc.setdefault("_id", ObjectId())
+        try:
+            self.spool.append(batch)
+            self._incr("spooled", len(batch))
+            return True
+        except OSError as e:
+            self._incr("failed", len(batch))
+            logger.error(f"Analytics buffer: spool write failed, {len(batch)} events lost: {e}")
+            return False
+
+    def _write(self, batch):
+        """Write a batch to MongoDB, or to the spool while the database is degraded"""
+        if self._degraded.is_set():
+            self._spool(batch)
+            return
+        try:
+            self._insert(batch)
+        except ConnectionFailure as e:
+            logger.error(f"Analytics buffer: database degraded, spooling events: {e}")
+            self._degraded.set()
+            self._spool(batch)
+        except Exception as e:
+            self._incr("failed", len(batch))
+            logger.error(f"Analytics buffer: bulk insert failed: {e}")
+
+    def _replay_loop(self):
+        while not self._stop.wait(self.replay_interval):
+            self.spool.sync()
+            if self._degraded.is_set():
+                if not db_manager.ping():
+                    continue
+                logger.info("Analytics buffer: database recovered, replaying spool")
+                self._degraded.clear()
+            self.replay()
+
+    def replay(self):
+        """Drain closed spool segments into MongoDB with bulk inserts"""
+        if self.spool is None:
+            return
+        self.spool.rotate()
+        for path in self.spool.claim_segments():
+            try:
+                for chunk in self.spool.read_segment(path, self.batch_size):
+                    self._insert(chunk, skip_existing=True)
+                    self._incr("replayed", len(chunk))
+            except Exception as e:
+                logger.error(f"Analytics buffer: spool replay failed, will retry: {e}")
+                self.spool.release(path)
+                self._degraded.set()
+                return
+            self.spool.finish(path)
+
+    def flush(self):
+        """Synchronously write everything currently queued"""
+        batch = self._drain_nowait()
+        while batch:
+            self._write(batch)
+            batch = self._drain_nowait()
+
+    def shutdown(self, timeout=5.0):
+        """Stop the background threads and flush remaining events"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._replayer is not None:
+            self._replayer.join(timeout)
+        self.flush()
+        if self.spool is not None:
+            self.spool.close()
+        self._thread = None
+
+    def stats(self):
+        """Return a snapshot of buffer counters"""
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        snapshot["queued"] = self._queue.qsize()
+        snapshot["degraded"] = self._degraded.is_set()
+        if self.spool is not None:
+            snapshot["spool_segments"] = self.spool.pending_segments()
+        return snapshot
+
+
+analytics_buffer = AnalyticsWriteBuffer(
+    collection_name=Config.ANALYTICS_COLLECTION,
+    max_size=Config.ANALYTICS_BUFFER_MAX_SIZE,
+    batch_size=Config.ANALYTICS_BUFFER_BATCH_SIZE,
+    flush_interval=Config.ANALYTICS_BUFFER_FLUSH_INTERVAL,
+    put_timeout=Config.ANALYTICS_BUFFER_PUT_TIMEOUT,
+    spool=DiskSpool(
+        Config.ANALYTICS_SPOOL_DIR,
+        segment_max_bytes=Config.ANALYTICS_SPOOL_SEGMENT_BYTES,
+        fsync_interval=Config.ANALYTICS_SPOOL_FSYNC_INTERVAL
+    ) if Config.ANALYTICS_SPOOL_DIR else None,
+    replay_interval=Config.ANALYTICS_SPOOL_REPLAY_INTERVAL
+)
+
+# Flush on worker shutdown
+atexit.register(analytics_buffer.shutdown)
@@ -0,0 +1,102 @@
+"""
+Online migration of analytics events into a time-series collection
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+
+from pymongo.errors import BulkWriteError
+
+from utils.database_optimized import db_manager
+from utils.analytics_rollup import META_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+
+def _checkpoint_id(target):
+    return f"migration:{target}"
+
+
+def _after(timestamp, object_id):
+    """Documents after (timestamp, _id) in ascending (timestamp, _id) order"""
+    return {"$or": [
+        {"timestamp": {"$gt": timestamp}},
+        {"timestamp": timestamp, "_id": {"$gt": object_id}}
+    ]}
+
+
+def copy_analytics_chunks(source, target, chunk_size=5000, overlap_minutes=60, full=False, progress=None):
+    """
+    Copy events from `source` into the time-series collection `target`
+    Documents are read in (timestamp, _id) order in chunks and the last
+    copied timestamp is checkpointed in analytics_meta, so the copy can run
+    while the app keeps writing and can be re-run to pick up events written
+    in the meantime.
+
+    Neither _id nor timestamp is strictly insertion-ordered: ids come from
+    several workers, and events replayed from the spool keep the id and
+    timestamp they were given when first received. A re-run therefore
+    resumes overlap_minutes before the checkpoint, and full=True rescans
+    everything as a final reconciliation pass. Time-series collections have
+    no unique _id index, so ids already present in the target are skipped
+    explicitly, which makes re-reading the overlap cheap and safe.
+    Returns:
+        int: number of documents copied in this run
+    """
+    src = db_manager.get_collection(source)
+    dst = db_manager.create_timeseries_collection(target)
+    meta = db_manager.get_collection(META_COLLECTION)
+
+    checkpoint = meta.find_one({"_id": _checkpoint_id(target)}) or {}
+    query = {}
+    if not full and checkpoint.get("last_timestamp") is not None:
+        query = {"timestamp": {"$gte": checkpoint["last_timestamp"] - timedelta(minutes=overlap_minutes)}}
+    resume_from = checkpoint.get("last_timestamp")
+
+    copied = 0
+    while True:
+        chunk = list(src.find(query).sort([("timestamp", 1), ("_id", 1)]).limit(chunk_size))
+        if not chunk:
+            break
+
+        existing = db_manager.existing_event_ids(dst, chunk)
+        new_docs = [db_manager.with_analytics_meta(doc) for doc in chunk if doc["_id"] not in existing]
+
+        if new_docs:
+            try:
+                dst.insert_many(new_docs, ordered=False)
+            except BulkWriteError as e:
+                logger.error(f"Analytics migration: chunk partially failed: {e.details.get('writeErrors', [])[:1]}")
+                raise
+
+        last = chunk[-1]
+        # A full rescan must not move the checkpoint backwards
+        if resume_from is None or last["timestamp"] > resume_from:
+            resume_from = last["timestamp"]
+            meta.update_one(
+                {"_id": _checkpoint_id(target)},
+                {"$set": {"last_timestamp": resume_from, "source": source, "updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+        query = _after(last["timestamp"], last["_id"])
+        copied += len(new_docs)
+        if progress:
+            progress(copied)
+
+    return copied
+
+
+def time_dashboard_query(collection_name, days=30, runs=3, timeseries=False):
+    """Best-of-N wall time in ms for the raw dashboard aggregation"""
+    from routes.analytics import _dashboard_from_raw
+
+    collection = db_manager.get_collection(collection_name)
+    start_date = datetime.utcnow() - timedelta(days=days)
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        _dashboard_from_raw(start_date, collection, timeseries)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
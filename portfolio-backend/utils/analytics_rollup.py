@@ -0,0 +1,313 @@
+"""
+Hourly analytics rollups
+
+Raw events are summarized into one document per (hour, type, key), where key
+is the page for page views and the project_id for project clicks. Ingest keeps
+the rollups current with $inc upserts; backfill_rollups() rebuilds them from
+raw events. Dashboard windows that do not start on an hour boundary read the
+leading partial hour from the raw collection, so rollup totals always match a
+raw scan of the same window.
+
+Unique visitors are tracked separately as one HyperLogLog sketch per UTC day
+in analytics_visitor_sketches, updated with per-register $max so concurrent
+and repeated updates are idempotent.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+from utils.database_optimized import db_manager
+from utils.hyperloglog import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = 'analytics_rollups'
+META_COLLECTION = 'analytics_meta'
+ROLLUP_STATE_ID = 'rollups'
+SKETCH_COLLECTION = 'analytics_visitor_sketches'
+
+# Sampled events carry a weight (1 / sampling rate); unsampled events count once
+EVENT_WEIGHT = {"$ifNull": ["$weight", 1]}
+
+
+def hour_floor(ts):
+    """Truncate a datetime to the start of its hour"""
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def hour_ceil(ts):
+    """Round a datetime up to the next hour boundary (unchanged if already on one)"""
+    floor = hour_floor(ts)
+    return floor if floor == ts else floor + timedelta(hours=1)
+
+
+def event_key(event):
+    """Rollup key for an event: page for page views, project_id for clicks"""
+    if event.get("type") == "project_click":
+        return event.get("project_id")
+    return event.get("page")
+
+
+def build_rollup_updates(events):
+    """
+    Collapse events into one $inc upsert per (hour, type, key)
+    Args:
+        events (list): raw event documents
+    Returns:
+        list: pymongo UpdateOne operations
+    """
+    counts = {}
+    titles = {}
+    for event in events:
+        bucket_id = (hour_floor(event["timestamp"]), event["type"], event_key(event))
+        counts[bucket_id] = counts.get(bucket_id, 0) + event.get("weight", 1)
+        if event.get("project_title"):
+            titles[bucket_id] = event["project_title"]
+
+    updates = []
+    for (bucket, event_type, key), count in counts.items():
+        update = {"$inc": {"count": count}}
+        if (bucket, event_type, key) in titles:
+            update["$set"] = {"title": titles[(bucket, event_type, key)]}
+        updates.append(UpdateOne(
+            {"bucket": bucket, "type": event_type, "key": key},
+            update,
+            upsert=True
+        ))
+    return updates
+
+
+def visitor_id(event):
+    """Visitor identity for unique counts; older events only have a user agent"""
+    return event.get("visitor_id") or event.get("user_agent")
+
+
+def build_sketch_updates(sketches):
+    """
+    One $max upsert per day sketch
+    Args:
+        sketches (dict): {"YYYY-MM-DD": HyperLogLog}
+    Returns:
+        list: pymongo UpdateOne operations
+    """
+    updates = []
+    for day, sketch in sketches.items():
+        registers = {f"registers.{i}": r for i, r in sketch.to_sparse().items()}
+        if registers:
+            updates.append(UpdateOne(
+                {"_id": day},
+                {"$max": registers, "$set": {"precision": sketch.precision}},
+                upsert=True
+            ))
+    return updates
+
+
+def _sketches_for(events):
+    sketches = {}
+    for event in events:
+        if event.get("type") != "page_view":
+            continue
+        day = event["timestamp"].strftime("%Y-%m-%d")
+        sketches.setdefault(day, HyperLogLog()).add(visitor_id(event) or "")
+    return sketches
+
+
+def apply_rollups(events):
+    """Fold freshly inserted events into the rollup and visitor sketch collections"""
+    if not events:
+        return
+    collection = db_manager.get_collection(ROLLUP_COLLECTION)
+    sketches = db_manager.get_collection(SKETCH_COLLECTION)
+    if collection is None or sketches is None:
+        logger.error(f"Rollups: database unavailable, {len(events)} events not rolled up")
+        return
+    try:
+        collection.bulk_write(build_rollup_updates(events), ordered=False)
+        sketch_updates = build_sketch_updates(_sketches_for(events))
+        if sketch_updates:
+            sketches.bulk_write(sketch_updates, ordered=False)
+    except Exception as e:
+        logger.error(f"Rollups: failed to apply increments: {e}")
+
+
+def unique_visitors_estimate(start, end=None):
+    """
+    Estimated unique visitors for the UTC days touched by [start, end]
+    Merges the per-day sketches; see HyperLogLog for the error bound.
+    """
+    end = end or datetime.utcnow()
+    days = []
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day <= end:
+        days.append(day.strftime("%Y-%m-%d"))
+        day += timedelta(days=1)
+
+    merged = HyperLogLog()
+    for doc in db_manager.get_collection(SKETCH_COLLECTION).find({"_id": {"$in": days}}):
+        merged.merge(HyperLogLog.from_sparse(doc.get("registers"), doc.get("precision", merged.precision)))
+    return merged.count()
+
+
+def backfill_visitor_sketches(batch_size=5000):
+    """
+    Rebuild per-day visitor sketches from raw page views
+    $max updates are idempotent, so this is safe to run during live ingest.
+    Returns:
+        int: number of day sketches written
+    """
+    cursor = db_manager.get_collection(db_manager.analytics_collection_name).find(
+        {db_manager.analytics_field("type"): "page_view"},
+        {"type": 1, "timestamp": 1, "visitor_id": 1, "user_agent": 1, "_id": 0}
+    ).batch_size(batch_size)
+
+    sketches = {}
+    for event in cursor:
+        day = event["timestamp"].strftime("%Y-%m-%d")
+        sketches.setdefault(day, HyperLogLog()).add(visitor_id(event) or "")
+
+    updates = build_sketch_updates(sketches)
+    if updates:
+        db_manager.get_collection(SKETCH_COLLECTION).bulk_write(updates, ordered=False)
+    return len(updates)
+
+
+def rollups_ready():
+    """True once a backfill has completed, i.e. rollups cover all raw events"""
+    meta = db_manager.get_collection(META_COLLECTION)
+    if meta is None:
+        return False
+    return meta.find_one({"_id": ROLLUP_STATE_ID}) is not None
+
+
+def backfill_rollups(until=None):
+    """
+    Rebuild rollup buckets from raw events
+    Buckets before `until` (default: start of the current hour) are replaced
+    with exact counts from the raw collection. Run it once after deploying
+    rollup ingest, after the first full hour of live increments has closed.
+    Args:
+        until (datetime): exclusive upper bound, must be on an hour boundary
+    Returns:
+        int: number of rollup buckets written
+    """
+    until = until or hour_floor(datetime.utcnow())
+    analytics = db_manager.get_collection(db_manager.analytics_collection_name)
+    rollups = db_manager.get_collection(ROLLUP_COLLECTION)
+
+    pipeline = [
+        {"$match": {"timestamp": {"$lt": until}}},
+        {"$group": {
+            "_id": {
+                "bucket": {"$dateFromParts": {
+                    "year": {"$year": "$timestamp"},
+                    "month": {"$month": "$timestamp"},
+                    "day": {"$dayOfMonth": "$timestamp"},
+                    "hour": {"$hour": "$timestamp"}
+                }},
+                "type": _field_path("type"),
+                "key": _raw_event_key()
+            },
+            "count": {"$sum": EVENT_WEIGHT},
+            "title": {"$last": "$project_title"}
+        }}
+    ]
+
+    written = 0
+    batch = []
+    for row in analytics.aggregate(pipeline, allowDiskUse=True):
+        fields = {"count": row["count"]}
+        if row.get("title"):
+            fields["title"] = row["title"]
+        batch.append(UpdateOne(
+            {"bucket": row["_id"]["bucket"], "type": row["_id"]["type"], "key": row["_id"].get("key")},
+            {"$set": fields},
+            upsert=True
+        ))
+        if len(batch) >= 1000:
+            rollups.bulk_write(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        rollups.bulk_write(batch, ordered=False)
+        written += len(batch)
+
+    sketch_days = backfill_visitor_sketches()
+
+    db_manager.get_collection(META_COLLECTION).update_one(
+        {"_id": ROLLUP_STATE_ID},
+        {"$set": {"backfilled_until": until, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    logger.info(
+        f"Rollups: backfilled {written} buckets before {until.isoformat()} "
+        f"and {sketch_days} visitor sketches"
+    )
+    return written
+
+
+def _field_path(name):
+    return "$" + db_manager.analytics_field(name)
+
+
+def _raw_event_key():
+    """event_key() as an aggregation expression over raw events"""
+    return {"$cond": [
+        {"$eq": [_field_path("type"), "project_click"]},
+        _field_path("project_id"),
+        _field_path("page")
+    ]}
+
+
+def _merge_rows(rows, result):
+    for row in rows:
+        row_id = (row["_id"]["type"], row["_id"].get("key"), row["_id"]["day"])
+        entry = result.setdefault(row_id, {"count": 0, "title": None})
+        entry["count"] += row["count"]
+        if row.get("title"):
+            entry["title"] = row["title"]
+
+
+def window_counts(start, end=None):
+    """
+    Event counts for [start, end) grouped by (type, key, day)
+    Whole hours come from the rollup collection; the leading partial hour,
+    if any, is read from raw events.
+    Returns:
+        dict: {(type, key, "YYYY-MM-DD"): {"count": int, "title": str|None}}
+    """
+    end = end or datetime.utcnow()
+    edge = min(hour_ceil(start), end)
+    result = {}
+
+    if start < edge:
+        raw_pipeline = [
+            {"$match": {"timestamp": {"$gte": start, "$lt": edge}}},
+            {"$group": {
+                "_id": {
+                    "type": _field_path("type"),
+                    "key": _raw_event_key(),
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}
+                },
+                "count": {"$sum": EVENT_WEIGHT},
+                "title": {"$last": "$project_title"}
+            }}
+        ]
+        _merge_rows(db_manager.get_collection(db_manager.analytics_collection_name).aggregate(raw_pipeline), result)
+
+    rollup_pipeline = [
+        {"$match": {"bucket": {"$gte": edge, "$lt": end}}},
+        {"$group": {
+            "_id": {
+                "type": "$type",
+                "key": "$key",
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$bucket"}}
+            },
+            "count": {"$sum": "$count"},
+            "title": {"$last": "$title"}
+        }}
+    ]
+    _merge_rows(db_manager.get_collection(ROLLUP_COLLECTION).aggregate(rollup_pipeline), result)
+
+    return result
@@ -0,0 +1,552 @@
+"""
+Cache engine and the `cached` decorator
+
+cache_manager is two-tier: a per-worker in-process L1 (CacheManager) in
+front of an optional shared L2 backend (see utils.cache_backends) so all
+workers on a host reuse each other's results. Deletes, tag invalidations and
+clears are broadcast over an invalidation bus (see utils.cache_bus) so other
+workers drop their L1 copies immediately.
+"""
+
+import hashlib
+import heapq
+import inspect
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+from config.config import Config
+from utils.cache_backends import create_backend
+from utils.cache_bus import create_bus
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value, _depth=0):
+    """Rough memory footprint of a cached value in bytes"""
+    if isinstance(value, (bytes, bytearray, str)):
+        return sys.getsizeof(value)
+    size = sys.getsizeof(value)
+    if _depth > 8:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += estimate_size(item, _depth + 1)
+    return size
+
+
+class CacheManager:
+    """
+    Bounded, thread-safe LRU cache with per-entry TTLs.
+
+    - Entries are evicted least-recently-used first once either max_entries
+      or max_bytes (estimated) is exceeded; get/set/delete are O(1).
+    - TTLs use time.monotonic(), so wall-clock changes don't affect expiry.
+    - Expired entries are removed when read, and proactively by an amortized
+      sweep: a min-heap of expiry times is popped a few entries at a time on
+      every write and by a background thread every sweep_interval seconds.
+    - Entries can carry tags; invalidate_tag() drops every entry with a tag.
+    - hits/misses/evictions/expirations counters are available via stats().
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024,
+                 sweep_interval=30.0, sweep_batch=64):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+
+        self._lock = threading.RLock()
+        self._data = OrderedDict()  # key -> (value, expires_at, size, tags)
+        self._expiry_heap = []      # (expires_at, key)
+        self._tags = {}             # tag -> set of keys
+        self._bytes = 0
+        self._sweeper = None
+        self._sweeper_pid = None
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0
+        }
+
+    def _ensure_sweeper(self):
+        if self.sweep_interval <= 0:
+            return
+        if self._sweeper is not None and self._sweeper_pid == os.getpid():
+            return
+        self._sweeper_pid = os.getpid()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="cache-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            self.sweep(limit=None)
+
+    def _remove(self, key):
+        value, expires_at, size, tags = self._data.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        """Get cached value if not expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            if entry[1] <= now:
+                self._remove(key)
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry[0]
+
+    def set(self, key, value, ttl_seconds=300, tags=()):
+        """Set cache value with TTL, optionally under invalidation tags"""
+        self._ensure_sweeper()
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            logger.debug(f"Cache: value for {key} ({size} bytes) exceeds max_bytes, not cached")
+            return
+
+        expires_at = time.monotonic() + ttl_seconds
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, size, tuple(tags))
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+            self._counters["sets"] += 1
+
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                evicted_key = next(iter(self._data))
+                self._remove(evicted_key)
+                self._counters["evictions"] += 1
+
+            self._sweep_locked(time.monotonic(), self.sweep_batch)
+
+    def delete(self, key):
+        """Delete cache entry"""
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def invalidate_tag(self, tag):
+        """Delete every entry stored under tag; returns the number removed"""
+        with self._lock:
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        """Clear all cache"""
+        with self._lock:
+            self._data.clear()
+            self._expiry_heap = []
+            self._tags.clear()
+            self._bytes = 0
+
+    def _sweep_locked(self, now, limit):
+        removed = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now and (limit is None or removed < limit):
+            expires_at, key = heapq.heappop(heap)
+            entry = self._data.get(key)
+            # Skip heap records superseded by a later set() or removal
+            if entry is not None and entry[1] == expires_at:
+                self._remove(key)
+                self._counters["expirations"] += 1
+                removed += 1
+
+        # Drop stale heap records once they dominate the heap
+        if len(heap) > 2 * len(self._data) + 64:
+            self._expiry_heap = [(entry[1], key) for key, entry in self._data.items()]
+            heapq.heapify(self._expiry_heap)
+        return removed
+
+    def sweep(self, limit=None):
+        """Remove expired entries; returns the number removed"""
+        with self._lock:
+            return self._sweep_locked(time.monotonic(), limit)
+
+    def stats(self):
+        """Counter snapshot for monitoring"""
+        with self._lock:
+            snapshot = dict(self._counters)
+            snapshot["entries"] = len(self._data)
+            snapshot["bytes"] = self._bytes
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_ratio"] = round(snapshot["hits"] / lookups, 4) if lookups else 0.0
+        return snapshot
+
+
+class TieredCache:
+    """
+    L1 (per-worker CacheManager) in front of an optional shared L2 backend.
+
+    Reads try L1, then L2; an L2 hit is copied into L1, with its tags, for
+    its remaining TTL.
+    Writes and deletes go to both tiers, and deletes/invalidations/clears are
+    published on the bus so other workers drop their L1 copies. L2 and bus
+    errors are logged and counted but never fail the request.
+    """
+
+    def __init__(self, l1, l2=None, bus=None):
+        self.l1 = l1
+        self.l2 = l2
+        self.bus = bus
+        self.origin = None
+        self._bus_pid = None
+        self._l2_counters = {"l2_hits": 0, "l2_misses": 0, "l2_errors": 0}
+        self._bus_counters = {"bus_sent": 0, "bus_received": 0, "bus_errors": 0}
+
+    def _ensure_bus(self):
+        # Subscribe once per process (workers are forked after import)
+        if self.bus is None or self._bus_pid == os.getpid():
+            return
+        self._bus_pid = os.getpid()
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{id(self)}"
+        try:
+            self.bus.start(self._apply_remote)
+        except Exception as e:
+            self._bus_counters["bus_errors"] += 1
+            logger.error(f"Cache: invalidation bus unavailable, other workers' L1 will expire on TTL: {e}")
+
+    def _publish(self, op, arg=None):
+        if self.bus is None:
+            return
+        self._ensure_bus()
+        try:
+            self.bus.publish({"op": op, "arg": arg, "origin": self.origin})
+            self._bus_counters["bus_sent"] += 1
+        except Exception as e:
+            self._bus_counters["bus_errors"] += 1
+            logger.warning(f"Cache: bus publish failed: {e}")
+
+    def _apply_remote(self, message):
+        """Apply another worker's invalidation to L1"""
+        if message.get("origin") == self.origin:
+            return
+        self._bus_counters["bus_received"] += 1
+        op = message.get("op")
+        if op == "delete":
+            self.l1.delete(message["arg"])
+        elif op == "tag":
+            self.l1.invalidate_tag(message["arg"])
+        elif op == "clear":
+            self.l1.clear()
+
+    def _l2_call(self, method, *args):
+        try:
+            return getattr(self.l2, method)(*args)
+        except Exception as e:
+            self._l2_counters["l2_errors"] += 1
+            logger.warning(f"Cache: L2 {method} failed: {e}")
+            return None
+
+    def get(self, key):
+        """Get cached value if not expired"""
+        self._ensure_bus()
+        value = self.l1.get(key)
+        if value is not None or self.l2 is None:
+            return value
+
+        hit = self._l2_call("get", key)
+        if hit is None:
+            self._l2_counters["l2_misses"] += 1
+            return None
+        self._l2_counters["l2_hits"] += 1
+        value, remaining, tags = hit
+        self.l1.set(key, value, remaining, tags)
+        return value
+
+    def set(self, key, value, ttl_seconds=300, tags=()):
+        """Set cache value with TTL in both tiers"""
+        self._ensure_bus()
+        self.l1.set(key, value, ttl_seconds, tags)
+        if self.l2 is not None:
+            self._l2_call("set", key, value, ttl_seconds, tuple(tags))
+
+    def delete(self, key):
+        """Delete cache entry from both tiers"""
+        self.l1.delete(key)
+        if self.l2 is not None:
+            self._l2_call("delete", key)
+        self._publish("delete", key)
+
+    def invalidate_tag(self, tag):
+        """Delete every entry stored under tag from both tiers"""
+        removed = self.l1.invalidate_tag(tag)
+        if self.l2 is not None:
+            self._l2_call("delete_tag", tag)
+        self._publish("tag", tag)
+        return removed
+
+    def clear(self):
+        """Clear both tiers"""
+        self.l1.clear()
+        if self.l2 is not None:
+            self._l2_call("clear")
+        self._publish("clear")
+
+    def acquire_lock(self, key, ttl_seconds):
+        """
+        Cross-worker mutex held in L2
+        Returns:
+            str: owner token to pass to release_lock(), or None if another
+                 caller holds the lock. Without an L2, or if L2 fails, the
+                 lock is always granted so callers fall back to per-process
+                 coordination.
+        """
+        token = uuid.uuid4().hex
+        if self.l2 is None:
+            return token
+        acquired = self._l2_call("add", f"lock:{key}", token, ttl_seconds)
+        return token if acquired is not False else None
+
+    def release_lock(self, key, token):
+        """
+        Release a lock taken by acquire_lock()
+        A no-op if the lock expired and was taken by someone else since.
+        """
+        if self.l2 is not None:
+            self._l2_call("delete_if_equal", f"lock:{key}", token)
+
+    def stats(self):
+        """L1 counters plus L2 and bus counters"""
+        snapshot = self.l1.stats()
+        snapshot.update(self._l2_counters)
+        snapshot.update(self._bus_counters)
+        return snapshot
+
+
+cache_manager = TieredCache(
+    CacheManager(
+        max_entries=Config.CACHE_MAX_ENTRIES,
+        max_bytes=Config.CACHE_MAX_BYTES,
+        sweep_interval=Config.CACHE_SWEEP_INTERVAL
+    ),
+    create_backend(
+        Config.CACHE_L2_BACKEND,
+        sqlite_path=Config.CACHE_SQLITE_PATH,
+        redis_url=Config.REDIS_URL
+    ),
+    create_bus(
+        Config.CACHE_BUS,
+        socket_dir=Config.CACHE_BUS_SOCKET_DIR,
+        redis_url=Config.REDIS_URL
+    )
+)
+
+
+class _Stamped:
+    """Cached value with a freshness deadline, for stale-while-revalidate"""
+
+    __slots__ = ("value", "fresh_until")
+
+    def __init__(self, value, fresh_until):
+        self.value = value
+        self.fresh_until = fresh_until
+
+    def __getstate__(self):
+        return (self.value, self.fresh_until)
+
+    def __setstate__(self, state):
+        self.value, self.fresh_until = state
+
+    def is_fresh(self):
+        # Wall clock, since L2 entries are shared between processes
+        return time.time() < self.fresh_until
+
+
+class _Call:
+    """An in-progress computation other callers can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _unwrap(hit):
+    return hit.value if isinstance(hit, _Stamped) else hit
+
+
+def _wait_for_peer(cache_key, timeout):
+    """Poll the shared tier while another worker computes the value"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        hit = cache_manager.get(cache_key)
+        if hit is not None:
+            return _unwrap(hit)
+        time.sleep(0.025)
+    return None
+
+
+def _single_flight(cache_key, compute, lock_timeout):
+    """
+    Run compute() once per key: concurrent callers in this process wait for
+    the leader's result, and other workers wait on the L2 lock holder.
+    """
+    with _inflight_lock:
+        call = _inflight.get(cache_key)
+        leader = call is None
+        if leader:
+            call = _inflight[cache_key] = _Call()
+
+    if not leader:
+        if call.event.wait(lock_timeout):
+            if call.error is not None:
+                raise call.error
+            return call.result
+        return compute()
+
+    try:
+        # Another leader may have filled the cache just before we registered
+        hit = cache_manager.get(cache_key)
+        if hit is not None and not (isinstance(hit, _Stamped) and not hit.is_fresh()):
+            call.result = _unwrap(hit)
+            return call.result
+
+        token = cache_manager.acquire_lock(cache_key, lock_timeout)
+        if token is not None:
+            try:
+                call.result = compute()
+            finally:
+                cache_manager.release_lock(cache_key, token)
+        else:
+            call.result = _wait_for_peer(cache_key, lock_timeout)
+            if call.result is None:
+                call.result = compute()
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        call.event.set()
+        with _inflight_lock:
+            _inflight.pop(cache_key, None)
+
+
+def _refresh_in_background(cache_key, compute, lock_timeout):
+    """Recompute a stale entry on a daemon thread, once per key host-wide"""
+    with _inflight_lock:
+        if cache_key in _inflight:
+            return
+        call = _inflight[cache_key] = _Call()
+
+    def run():
+        try:
+            token = cache_manager.acquire_lock(cache_key, lock_timeout)
+            if token is not None:
+                try:
+                    call.result = compute()
+                finally:
+                    cache_manager.release_lock(cache_key, token)
+        except Exception as e:
+            call.error = e
+            logger.error(f"Cache: background refresh of {cache_key} failed: {e}")
+        finally:
+            call.event.set()
+            with _inflight_lock:
+                _inflight.pop(cache_key, None)
+
+    threading.Thread(target=run, name="cache-refresh", daemon=True).start()
+
+
+def cached(ttl_seconds=300, single_flight=False, stale_while_revalidate=0, lock_timeout=30, tags=()):
+    """
+    Decorator for caching function results
+    Args:
+        ttl_seconds (int): how long a result is fresh
+        single_flight (bool): on a miss, only one caller per key recomputes
+            while concurrent callers (in any worker, with an L2) wait for it
+        stale_while_revalidate (int): for this many seconds after expiry the
+            stale result is served immediately while one background refresh
+            runs; implies single-flight for cold misses
+        lock_timeout (int): longest a caller waits on another's computation
+        tags (tuple): invalidation tags, see cache_manager.invalidate_tag()
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            # Key on the bound arguments (defaults filled in), so f(), f(None)
+            # and f(fields=None) share one entry
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = json.dumps(bound.arguments, sort_keys=True)
+            cache_key = f"{func.__name__}:{hashlib.md5(arguments.encode()).hexdigest()}"
+
+            def compute():
+                result = func(*args, **kwargs)
+                if stale_while_revalidate:
+                    cache_manager.set(
+                        cache_key,
+                        _Stamped(result, time.time() + ttl_seconds),
+                        ttl_seconds + stale_while_revalidate,
+                        tags
+                    )
+                else:
+                    cache_manager.set(cache_key, result, ttl_seconds, tags)
+                logger.debug(f"Cache miss for {func.__name__}, cached for {ttl_seconds}s")
+                return result
+
+            # Check cache
+            result = cache_manager.get(cache_key)
+            if result is not None:
+                if isinstance(result, _Stamped):
+                    if not result.is_fresh():
+                        _refresh_in_background(cache_key, compute, lock_timeout)
+                    result = result.value
+                logger.debug(f"Cache hit for {func.__name__}")
+                return result
+
+            # Call function and cache result
+            if single_flight or stale_while_revalidate:
+                return _single_flight(cache_key, compute, lock_timeout)
+            return compute()
+
+        return wrapper
+
+    return decorator
+
+
+def render_metrics(stats, prefix):
+    """Render a flat dict of counters in Prometheus text exposition format"""
+    lines = []
+    for name, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        lines.append(f"{prefix}_{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,265 @@
+"""
+Shared (L2) cache backends
+
+Every gunicorn worker keeps its own in-process L1 cache; an L2 backend is
+shared by all workers so a value computed by one worker is reused by the
+others. Values are pickled, so only point backends at stores you trust.
+"""
+
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """Interface for shared cache backends"""
+
+    def get(self, key):
+        """
+        Returns:
+            tuple: (value, remaining_ttl_seconds, tags), or None on a miss
+        """
+        raise NotImplementedError
+
+    def set(self, key, value, ttl_seconds, tags=()):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def delete_tag(self, tag):
+        """Delete every entry stored with this tag"""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def add(self, key, value, ttl_seconds):
+        """Set only if absent (or expired); returns True if this call set it"""
+        raise NotImplementedError
+
+    def delete_if_equal(self, key, value):
+        """Delete only if the entry still holds value; returns True if deleted"""
+        raise NotImplementedError
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Single-host shared cache in a SQLite file (WAL mode), for deployments
+    without Redis. All workers on the host open the same file.
+    """
+
+    def __init__(self, path, prune_every=500):
+        self.path = path
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL, "
+                "tags TEXT NOT NULL DEFAULT '[]')"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_tags ("
+                "tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key))"
+            )
+            # Files created before entries carried their tags
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+            if "tags" not in columns:
+                conn.execute("ALTER TABLE cache ADD COLUMN tags TEXT NOT NULL DEFAULT '[]'")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT value, expires_at, tags FROM cache WHERE key = ? AND expires_at > ?",
+            (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), row[1] - now, tuple(json.loads(row[2]))
+
+    def set(self, key, value, ttl_seconds, tags=()):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, tags) VALUES (?, ?, ?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), time.time() + ttl_seconds,
+             json.dumps(list(tags)))
+        )
+        if tags:
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)",
+                [(tag, key) for tag in tags]
+            )
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            conn.execute("DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache)")
+
+    def delete(self, key):
+        self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def delete_tag(self, tag):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache_tags WHERE tag = ?)",
+                (tag,)
+            )
+            conn.execute("DELETE FROM cache_tags WHERE tag = ?", (tag,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM cache")
+        conn.execute("DELETE FROM cache_tags")
+
+    def add(self, key, value, ttl_seconds):
+        now = time.time()
+        cursor = self._connection().execute(
+            "INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at, "
+            "tags = '[]' WHERE cache.expires_at <= ?",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now + ttl_seconds, now)
+        )
+        return cursor.rowcount == 1
+
+    def delete_if_equal(self, key, value):
+        cursor = self._connection().execute(
+            "DELETE FROM cache WHERE key = ? AND value = ?",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        )
+        return cursor.rowcount == 1
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Shared cache in Redis, for one or many hosts
+
+    Each entry's tags are kept in a companion set (prefix + "tags:" + key)
+    with the same TTL, so readers can re-tag the copy they put in L1.
+    """
+
+    # Compare-and-delete in one round trip, so a lock is only released by its owner
+    DELETE_IF_EQUAL = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    # Drop a tag set and every entry in it in one step, so an entry tagged
+    # between reading the set and deleting it can't be orphaned
+    # ARGV: prefix, entry tags key prefix
+    DELETE_TAG = """
+    local members = redis.call('SMEMBERS', KEYS[1])
+    for _, member in ipairs(members) do
+        redis.call('DEL', member, ARGV[2] .. string.sub(member, string.len(ARGV[1]) + 1))
+    end
+    redis.call('DEL', KEYS[1])
+    return #members
+    """
+
+    def __init__(self, url, prefix="portfolio:cache:"):
+        import redis  # optional dependency, only needed for this backend
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+        self._delete_if_equal = self.client.register_script(self.DELETE_IF_EQUAL)
+        self._delete_tag = self.client.register_script(self.DELETE_TAG)
+
+    def _key(self, key):
+        return f"{self.prefix}{key}"
+
+    def _tag_key(self, tag):
+        return f"{self.prefix}tag:{tag}"
+
+    def _entry_tags_key(self, key):
+        return f"{self.prefix}tags:{key}"
+
+    def get(self, key):
+        pipe = self.client.pipeline()
+        pipe.get(self._key(key))
+        pipe.pttl(self._key(key))
+        pipe.smembers(self._entry_tags_key(key))
+        raw, pttl, tags = pipe.execute()
+        if raw is None or pttl is None or pttl <= 0:
+            return None
+        return pickle.loads(raw), pttl / 1000.0, tuple(tag.decode() for tag in tags)
+
+    def set(self, key, value, ttl_seconds, tags=()):
+        ttl_ms = max(1, int(ttl_seconds * 1000))
+        entry_tags_key = self._entry_tags_key(key)
+        pipe = self.client.pipeline()
+        pipe.set(self._key(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL), px=ttl_ms)
+        pipe.delete(entry_tags_key)
+        if tags:
+            pipe.sadd(entry_tags_key, *tags)
+            pipe.pexpire(entry_tags_key, ttl_ms)
+        for tag in tags:
+            pipe.sadd(self._tag_key(tag), self._key(key))
+        pipe.execute()
+
+    def delete(self, key):
+        self.client.delete(self._key(key), self._entry_tags_key(key))
+
+    def delete_tag(self, tag):
+        return self._delete_tag(keys=[self._tag_key(tag)], args=[self.prefix, self._entry_tags_key("")])
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*", count=500))
+        for i in range(0, len(keys), 500):
+            self.client.delete(*keys[i:i + 500])
+
+    def add(self, key, value, ttl_seconds):
+        return bool(self.client.set(
+            self._key(key),
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            px=max(1, int(ttl_seconds * 1000)),
+            nx=True
+        ))
+
+    def delete_if_equal(self, key, value):
+        return bool(self._delete_if_equal(
+            keys=[self._key(key)],
+            args=[pickle.dumps(value, pickle.HIGHEST_PROTOCOL)]
+        ))
+
+
+def create_backend(name, sqlite_path=None, redis_url=None):
+    """Build the configured L2 backend; None disables the shared tier"""
+    name = (name or "none").lower()
+    try:
+        if name == "sqlite":
+            return SQLiteCacheBackend(sqlite_path)
+        if name == "redis":
+            return RedisCacheBackend(redis_url)
+    except Exception as e:
+        logger.error(f"Cache: failed to initialise '{name}' L2 backend, using L1 only: {e}")
+        return None
+    if name != "none":
+        logger.error(f"Cache: unknown L2 backend '{name}', using L1 only")
+    return None
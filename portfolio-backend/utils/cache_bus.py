@@ -0,0 +1,193 @@
+"""
+Cross-worker cache invalidation bus
+
+Each gunicorn worker has its own L1 cache, so a delete/tag invalidation in
+one worker must be broadcast to the others. Messages are small JSON dicts
+    {"op": "delete" | "tag" | "clear", "arg": <key or tag>, "origin": <id>}
+and receivers apply them to their L1 only (the shared L2 was already updated
+by the sender).
+
+Transports:
+    LocalBus       - in-process fan-out, for tests and single-process runs
+    UnixSocketBus  - one datagram socket per process in a shared directory,
+                     for all workers on one host
+    RedisBus       - Redis pub/sub, for workers on several hosts
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidationBus:
+    """Interface for invalidation transports"""
+
+    def start(self, handler):
+        """Deliver messages from other processes to handler(message)"""
+        raise NotImplementedError
+
+    def publish(self, message):
+        raise NotImplementedError
+
+
+class LocalBus(InvalidationBus):
+    """Synchronous fan-out to every subscriber in this process"""
+
+    def __init__(self):
+        self._handlers = []
+        self._lock = threading.Lock()
+
+    def start(self, handler):
+        with self._lock:
+            if handler not in self._handlers:
+                self._handlers.append(handler)
+
+    def publish(self, message):
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler in handlers:
+            handler(message)
+
+
+class UnixSocketBus(InvalidationBus):
+    """
+    Every process binds <directory>/<pid>.sock (SOCK_DGRAM) and publishing
+    sends the message to every other socket in the directory. Sockets left
+    behind by dead processes are removed when a send to them is refused.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._sock = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._sender = None
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f"{pid}.sock")
+
+    def start(self, handler):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(os.getpid())
+            if os.path.exists(path):
+                os.remove(path)
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.bind(path)
+            self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sender.setblocking(False)
+            self._pid = os.getpid()
+            atexit.register(self.close)
+            threading.Thread(
+                target=self._listen,
+                args=(self._sock, handler),
+                name="cache-bus",
+                daemon=True
+            ).start()
+
+    def _listen(self, sock, handler):
+        while True:
+            try:
+                data = sock.recv(65536)
+                handler(json.loads(data))
+            except OSError as e:
+                if sock is self._sock:  # not closed by close()
+                    logger.error(f"Cache bus: socket receive failed, stopping listener: {e}")
+                return
+            except Exception as e:
+                logger.error(f"Cache bus: bad message: {e}")
+
+    def publish(self, message):
+        if self._sender is None or self._pid != os.getpid():
+            return
+        data = json.dumps(message).encode()
+        own = self._path(os.getpid())
+        for path in glob.glob(os.path.join(self.directory, "*.sock")):
+            if path == own:
+                continue
+            try:
+                self._sender.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Nobody listening: the process that bound it has exited
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                logger.warning(f"Cache bus: receive buffer full for {path}, message dropped")
+
+    def close(self):
+        with self._lock:
+            if self._pid == os.getpid() and self._sock is not None:
+                self._sock.close()
+                self._sender.close()
+                try:
+                    os.remove(self._path(self._pid))
+                except OSError:
+                    pass
+            self._sock = self._sender = self._pid = None
+
+
+class RedisBus(InvalidationBus):
+    """Redis pub/sub channel shared by every worker on every host"""
+
+    def __init__(self, url, channel="portfolio:cache:invalidate"):
+        import redis  # optional dependency, only needed for this transport
+
+        self.client = redis.Redis.from_url(url, socket_connect_timeout=0.5)
+        self.channel = channel
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self, handler):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._listen, args=(handler,), name="cache-bus", daemon=True).start()
+
+    def _listen(self, handler):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for item in pubsub.listen():
+                    try:
+                        handler(json.loads(item["data"]))
+                    except Exception as e:
+                        logger.error(f"Cache bus: bad message: {e}")
+            except Exception as e:
+                logger.warning(f"Cache bus: Redis subscription lost, retrying: {e}")
+                time.sleep(1)
+
+    def publish(self, message):
+        self.client.publish(self.channel, json.dumps(message))
+
+
+def create_bus(name, socket_dir=None, redis_url=None):
+    """Build the configured bus; None disables cross-worker invalidation"""
+    name = (name or "none").lower()
+    try:
+        if name == "local":
+            return LocalBus()
+        if name == "unix":
+            if not hasattr(socket, "AF_UNIX"):
+                raise OSError("Unix sockets are not available on this platform")
+            return UnixSocketBus(socket_dir)
+        if name == "redis":
+            return RedisBus(redis_url)
+    except Exception as e:
+        logger.error(f"Cache: failed to initialise '{name}' invalidation bus: {e}")
+        return None
+    if name != "none":
+        logger.error(f"Cache: unknown invalidation bus '{name}'")
+    return None
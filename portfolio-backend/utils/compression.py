@@ -0,0 +1,90 @@
+"""
+Response compression negotiated on Accept-Encoding
+
+gzip is always available; brotli is used when the optional `brotli` package
+is installed and the client accepts it. Only responses whose type is in
+COMPRESSION_MIMETYPES and whose body is at least COMPRESSION_MIN_SIZE bytes
+are compressed. Streamed responses and responses that already carry a
+Content-Encoding (e.g. precompressed cached bodies, gzip exports) are left
+alone.
+"""
+
+import gzip
+
+from flask import request
+
+from config.config import Config
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+def available_encodings():
+    """Encodings this server can produce, in order of preference"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(offered=None):
+    """
+    Pick the preferred encoding the client accepts
+    Args:
+        offered (iterable): candidate encodings (default: all available)
+    Returns:
+        str: "br" or "gzip", or None for identity
+    """
+    accept = request.accept_encodings
+    for encoding in offered or available_encodings():
+        if accept.quality(encoding) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding):
+    """Compress bytes with the configured level for encoding"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=Config.COMPRESSION_BROTLI_QUALITY)
+    # mtime=0 keeps output deterministic for identical bodies
+    return gzip.compress(data, Config.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def compressible(response):
+    """Whether a response's type and size make it worth compressing"""
+    return (
+        response.mimetype in Config.COMPRESSION_MIMETYPES
+        and response.content_length is not None
+        and response.content_length >= Config.COMPRESSION_MIN_SIZE
+    )
+
+
+def compress_response(response):
+    """after_request hook: compress the body in place when negotiated"""
+    if (
+        not Config.COMPRESSION_ENABLED
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in Config.COMPRESSION_MIMETYPES
+    ):
+        return response
+
+    # The representation depends on Accept-Encoding whatever we pick below
+    response.vary.add('Accept-Encoding')
+    if not compressible(response):
+        return response
+
+    encoding = negotiate()
+    if encoding is None:
+        return response
+
+    response.set_data(compress(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+
+    # Strong ETags must differ between encodings
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+    return response
@@ -0,0 +1,94 @@
+"""
+Denormalized counters kept in a small `counters` collection
+
+    { _id: "<name>", count: <int>, seeded: <bool>, updated_at }
+
+Writers adjust a counter with $inc alongside the write it mirrors, so
+reading it is a single _id lookup instead of a count over the collection.
+
+A counter is seeded once from a real count. The document is created
+(count 0) before counting, so increments made while the count runs are
+recorded rather than lost; the count is then added on top, and only by the
+first seeder. Seeding happens at app startup and, failing that, on first
+read. `flask reconcile-counters` overwrites a counter that has drifted
+with a fresh count.
+"""
+
+from datetime import datetime
+
+from utils.database_optimized import db_manager
+
+COUNTERS_COLLECTION = 'counters'
+
+UNREAD_CONTACTS = 'contacts_unread'
+
+
+def _collection():
+    return db_manager.get_collection(COUNTERS_COLLECTION)
+
+
+def count_unread_contacts():
+    """The true value of UNREAD_CONTACTS"""
+    return db_manager.get_collection('contacts').count_documents({"read": False})
+
+
+def seed_counter(name, recount):
+    """
+    Initialise a counter from recount() unless it is already seeded
+    Args:
+        recount (callable): returns the true value
+    Returns:
+        int: the counter's value
+    """
+    counters = _collection()
+    # Exists before counting, so concurrent incr_counter() calls land
+    counters.update_one(
+        {"_id": name},
+        {"$setOnInsert": {"count": 0, "seeded": False, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    doc = counters.find_one({"_id": name})
+    if doc.get("seeded", True):
+        return doc["count"]
+
+    baseline = recount()
+    counters.update_one(
+        {"_id": name, "seeded": False},
+        {"$inc": {"count": baseline}, "$set": {"seeded": True, "updated_at": datetime.utcnow()}}
+    )
+    return counters.find_one({"_id": name})["count"]
+
+
+def get_counter(name, recount):
+    """
+    Current value of a counter
+    Args:
+        recount (callable): returns the true value; used to seed the counter
+    """
+    doc = _collection().find_one({"_id": name}, {"count": 1, "seeded": 1})
+    if doc is not None and doc.get("seeded", True):
+        return doc["count"]
+    return seed_counter(name, recount)
+
+
+def reset_counter(name, value):
+    """
+    Overwrite a counter, e.g. after reconciling it with a real count
+    Increments made between taking the count and this write are lost, so
+    reconcile when the counted collection is quiet.
+    """
+    _collection().update_one(
+        {"_id": name},
+        {"$set": {"count": value, "seeded": True, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return value
+
+
+def incr_counter(name, amount=1):
+    """Adjust a counter; a no-op until seeding has created it"""
+    if amount:
+        _collection().update_one(
+            {"_id": name},
+            {"$inc": {"count": amount}, "$set": {"updated_at": datetime.utcnow()}}
+        )
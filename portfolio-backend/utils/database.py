@@ -10,6 +10,7 @@ from utils.database_optimized import (
     skills_collection,
     analytics_collection,
     admin_collection,
+    listing_collection,
     cache_manager,
     cached
 )
@@ -22,6 +23,7 @@ __all__ = [
     'skills_collection',
     'analytics_collection',
     'admin_collection',
+    'listing_collection',
     'cache_manager',
     'cached'
 ]
\ No newline at end of file
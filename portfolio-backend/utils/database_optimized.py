@@ -2,12 +2,16 @@
 Database optimization utilities
 """
 
+from bson.raw_bson import RawBSONDocument
 from pymongo import MongoClient, ASCENDING, DESCENDING, TEXT
 from config.config import Config
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Event fields copied into the metaField of a time-series analytics collection
+ANALYTICS_META_FIELDS = ('type', 'page', 'project_id')
+
 
 class DatabaseManager:
     """Enhanced database manager with connection pooling and indexes"""
@@ -15,6 +19,8 @@ class DatabaseManager:
     def __init__(self):
         self.client = None
         self.db = None
+        self.analytics_collection_name = Config.ANALYTICS_COLLECTION
+        self.analytics_timeseries = Config.ANALYTICS_TIMESERIES
 
     def connect(self):
         """Create MongoDB connection with connection pooling"""
@@ -37,6 +43,10 @@ class DatabaseManager:
 
             logger.info("✓ Successfully connected to MongoDB with connection pooling")
 
+            # Create the analytics time-series collection if configured
+            if self.analytics_timeseries:
+                self.create_timeseries_collection(self.analytics_collection_name)
+
             # Create indexes
             self.create_indexes()
 
@@ -60,17 +70,34 @@ class DatabaseManager:
             self.db.skills.create_index([('name', ASCENDING)], unique=True)
 
             # Contacts indexes
-            self.db.contacts.create_index([('created_at', DESCENDING)])
-            self.db.contacts.create_index([('read', ASCENDING)])
+            # (read, created_at, _id) serves the inbox pages, the read filter
+            # and bulk mark-read; (created_at, _id) the unfiltered pages
+            self._drop_indexes(self.db.contacts, ['created_at_-1', 'read_1'])
+            self.db.contacts.create_index([('created_at', DESCENDING), ('_id', DESCENDING)])
+            self.db.contacts.create_index([
+                ('read', ASCENDING),
+                ('created_at', DESCENDING),
+                ('_id', DESCENDING)
+            ])
             self.db.contacts.create_index([('email', ASCENDING)])
 
+            # Email outbox: due messages are claimed oldest first
+            self.db.outbox.create_index([
+                ('status', ASCENDING),
+                ('next_attempt_at', ASCENDING)
+            ])
+
             # Analytics indexes
-            self.db.analytics.create_index([('timestamp', DESCENDING)])
-            self.db.analytics.create_index([('type', ASCENDING)])
-            self.db.analytics.create_index([
+            analytics = self.db[self.analytics_collection_name]
+            self._drop_indexes(analytics, ['timestamp_-1', 'type_1', 'type_1_timestamp_-1'])
+            self.create_analytics_indexes(analytics, self.analytics_timeseries)
+
+            # Analytics rollup indexes
+            self.db.analytics_rollups.create_index([
+                ('bucket', ASCENDING),
                 ('type', ASCENDING),
-                ('timestamp', DESCENDING)
-            ])
+                ('key', ASCENDING)
+            ], unique=True)
 
             # Admin indexes
             self.db.admins.create_index([('username', ASCENDING)], unique=True)
@@ -80,6 +107,103 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"Error creating indexes: {e}")
 
+    def create_analytics_indexes(self, collection, timeseries):
+        """
+        Every event-browsing filter has a (filter, timestamp, _id) index for
+        keyset pagination. In a time-series collection the filters are the
+        metaField paths (see analytics_field); otherwise page/project_id are
+        sparse since each only exists on one event type.
+        """
+        collection.create_index([('timestamp', DESCENDING), ('_id', DESCENDING)])
+        for name in ANALYTICS_META_FIELDS:
+            collection.create_index([
+                (self.analytics_field(name, timeseries), ASCENDING),
+                ('timestamp', DESCENDING),
+                ('_id', DESCENDING)
+            ], sparse=name != 'type' and not timeseries)
+
+    @staticmethod
+    def _drop_indexes(collection, names):
+        """Drop superseded indexes if present"""
+        existing = set(collection.index_information())
+        for name in names:
+            if name in existing:
+                collection.drop_index(name)
+                logger.info(f"Dropped superseded index {collection.name}.{name}")
+
+    def create_timeseries_collection(self, name, granularity=None):
+        """
+        Create a time-series collection for analytics events if it doesn't exist
+        timestamp is the timeField; "meta" holds {type, page, project_id}, and
+        the new collection gets the analytics indexes on those paths
+        """
+        if name in self.db.list_collection_names():
+            return self.db[name]
+
+        self.db.create_collection(name, timeseries={
+            'timeField': 'timestamp',
+            'metaField': 'meta',
+            'granularity': granularity or Config.ANALYTICS_TIMESERIES_GRANULARITY
+        })
+        self.create_analytics_indexes(self.db[name], timeseries=True)
+        logger.info(f"✓ Created time-series collection '{name}'")
+        return self.db[name]
+
+    @staticmethod
+    def with_analytics_meta(event):
+        """Copy the fields time-series buckets are grouped by into event["meta"]"""
+        event["meta"] = {name: event.get(name) for name in ANALYTICS_META_FIELDS}
+        return event
+
+    def analytics_field(self, name, timeseries=None):
+        """
+        Path to filter or group events by `name`
+        In a time-series collection type/page/project_id are read from the
+        metaField, which buckets and their indexes are keyed on; the top-level
+        copies are only there for serialization.
+        Args:
+            timeseries (bool): defaults to the configured analytics collection
+        """
+        if timeseries is None:
+            timeseries = self.analytics_timeseries
+        return f"meta.{name}" if timeseries and name in ANALYTICS_META_FIELDS else name
+
+    @staticmethod
+    def existing_event_ids(collection, events):
+        """
+        _ids of `events` already stored in an analytics collection
+        Time-series collections have no unique _id index, so re-inserting
+        (replays, migration overlaps) must filter on this instead of relying
+        on duplicate-key errors. The timestamp range lets the lookup prune
+        buckets.
+        """
+        if not events:
+            return set()
+        query = {"_id": {"$in": [event["_id"] for event in events]}}
+        timestamps = [event["timestamp"] for event in events if event.get("timestamp") is not None]
+        if len(timestamps) == len(events):
+            query["timestamp"] = {"$gte": min(timestamps), "$lte": max(timestamps)}
+        return {doc["_id"] for doc in collection.find(query, {"_id": 1})}
+
+    def collection_stats(self, name):
+        """Document count, storage size and index size for a collection"""
+        stats = self.db.command('collStats', name)
+        return {
+            "count": stats.get("count", 0),
+            "storage_size": stats.get("storageSize", 0),
+            "index_size": stats.get("totalIndexSize", 0)
+        }
+
+    def ping(self):
+        """True if the database answers a ping, reconnecting if needed"""
+        try:
+            if self.client is None or self.db is None:
+                return self.connect() is not None
+            self.client.admin.command('ping')
+            return True
+        except Exception:
+            return False
+
     def get_collection(self, name):
         """Get a collection with error handling"""
         if self.db is None:
@@ -100,75 +224,20 @@ db = db_manager.connect()
 contacts_collection = db_manager.get_collection('contacts')
 projects_collection = db_manager.get_collection('projects')
 skills_collection = db_manager.get_collection('skills')
-analytics_collection = db_manager.get_collection('analytics')
+analytics_collection = db_manager.get_collection(db_manager.analytics_collection_name)
 admin_collection = db_manager.get_collection('admins')
 
-# Cache implementation
-from functools import lru_cache, wraps
-from datetime import datetime, timedelta
-import hashlib
-import json
-
-
-class CacheManager:
-    """Simple in-memory cache (use Redis in production)"""
-
-    def __init__(self):
-        self.cache = {}
-        self.ttl = {}
-
-    def get(self, key):
-        """Get cached value if not expired"""
-        if key in self.cache:
-            if datetime.utcnow() < self.ttl.get(key, datetime.utcnow()):
-                return self.cache[key]
-            else:
-                del self.cache[key]
-                del self.ttl[key]
-        return None
-
-    def set(self, key, value, ttl_seconds=300):
-        """Set cache value with TTL"""
-        self.cache[key] = value
-        self.ttl[key] = datetime.utcnow() + timedelta(seconds=ttl_seconds)
-
-    def delete(self, key):
-        """Delete cache entry"""
-        if key in self.cache:
-            del self.cache[key]
-            del self.ttl[key]
-
-    def clear(self):
-        """Clear all cache"""
-        self.cache.clear()
-        self.ttl.clear()
-
-
-cache_manager = CacheManager()
-
-
-def cached(ttl_seconds=300):
-    """Decorator for caching function results"""
-
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # Create cache key from function name and arguments
-            cache_key = f"{func.__name__}:{hashlib.md5(json.dumps([args, kwargs], sort_keys=True).encode()).hexdigest()}"
-
-            # Check cache
-            result = cache_manager.get(cache_key)
-            if result is not None:
-                logger.debug(f"Cache hit for {func.__name__}")
-                return result
-
-            # Call function and cache result
-            result = func(*args, **kwargs)
-            cache_manager.set(cache_key, result, ttl_seconds)
-            logger.debug(f"Cache miss for {func.__name__}, cached for {ttl_seconds}s")
-
-            return result
 
-        return wrapper
+def listing_collection(collection):
+    """
+    Collection to read list endpoints from. With RAW_BSON_LISTS, documents
+    come back as RawBSONDocument and are only decoded when a field is read.
+    """
+    if not Config.RAW_BSON_LISTS:
+        return collection
+    return collection.with_options(
+        codec_options=collection.codec_options.with_options(document_class=RawBSONDocument)
+    )
 
-    return decorator
\ No newline at end of file
+# Cache implementation (re-exported for backward compatibility)
+from utils.cache import CacheManager, cache_manager, cached  # noqa: E402,F401
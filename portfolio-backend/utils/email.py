@@ -1,15 +1,24 @@
-from flask_mail import Message
+import smtplib
+import time
+
+from flask import current_app
+from flask_mail import Connection, Message
 from config.config import Config
 
-def send_contact_notification(mail, name, email, message):
+
+def build_contact_notification(name, email, message):
     """
-    Send email notification when someone submits the contact form
+    Email to the site owner about a new contact form submission
+    Returns a plain dict so it can be stored in the outbox
     """
-    try:
-        msg = Message(
-            subject=f"New Contact Form Submission from {name}",
-            recipients=[Config.ADMIN_EMAIL],
-            body=f"""
+    return {
+        "kind": "contact_notification",
+        # Held for the admin digest when ADMIN_DIGEST_MINUTES is set
+        "digestible": True,
+        "contact": {"name": name, "email": email, "message": message},
+        "subject": f"New Contact Form Submission from {name}",
+        "recipients": [Config.ADMIN_EMAIL],
+        "body": f"""
 You have received a new contact form submission:
 
 Name: {name}
@@ -21,31 +30,144 @@ Message:
 ---
 This is an automated notification from your portfolio website.
             """
-        )
-        mail.send(msg)
-        return True
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return False
-
-def send_confirmation_email(mail, recipient_email, name):
-    """
-    Send confirmation email to the person who submitted the form
-    """
-    try:
-        msg = Message(
-            subject="Thanks for reaching out!",
-            recipients=[recipient_email],
-            body=f"""
+    }
+
+
+def build_confirmation_email(recipient_email, name):
+    """
+    Email thanking the person who submitted the form
+    Returns a plain dict so it can be stored in the outbox
+    """
+    return {
+        "kind": "confirmation",
+        "subject": "Thanks for reaching out!",
+        "recipients": [recipient_email],
+        "body": f"""
 Hi {name},
 
 Thank you for contacting me through my portfolio website. I have received your message and will get back to you soon.
 
 Best regards
             """
-        )
-        mail.send(msg)
-        return True
-    except Exception as e:
-        print(f"Error sending confirmation email: {e}")
-        return False
\ No newline at end of file
+    }
+
+
+def build_admin_digest(notifications):
+    """
+    One email to the site owner covering several contact notifications
+    Args:
+        notifications (list): contact notification dicts, oldest first
+    """
+    count = len(notifications)
+    entries = "\n\n---\n\n".join(
+        f"Name: {n['contact']['name']}\nEmail: {n['contact']['email']}\n\nMessage:\n{n['contact']['message']}"
+        for n in notifications
+    )
+    return {
+        "kind": "contact_digest",
+        "subject": f"{count} new contact form submission{'s' if count != 1 else ''}",
+        "recipients": [Config.ADMIN_EMAIL],
+        "body": f"""
+You have received {count} new contact form submission{'s' if count != 1 else ''}:
+
+{entries}
+
+---
+This is an automated digest from your portfolio website.
+            """
+    }
+
+
+def to_message(email_doc):
+    """Flask-Mail Message for an email dict (or outbox document)"""
+    return Message(
+        subject=email_doc["subject"],
+        recipients=email_doc["recipients"],
+        body=email_doc["body"]
+    )
+
+
+class _TimedConnection(Connection):
+    """Flask-Mail connection whose socket operations time out"""
+
+    def __init__(self, mail, timeout):
+        super().__init__(mail)
+        self.timeout = timeout
+
+    def configure_host(self):
+        smtp = smtplib.SMTP_SSL if self.mail.use_ssl else smtplib.SMTP
+        host = smtp(self.mail.server, self.mail.port, timeout=self.timeout)
+        host.set_debuglevel(int(self.mail.debug))
+        if self.mail.use_tls:
+            host.starttls()
+        if self.mail.username and self.mail.password:
+            host.login(self.mail.username, self.mail.password)
+        return host
+
+
+class SMTPSession:
+    """
+    A reusable Flask-Mail connection
+
+    Opened on the first send and kept open between messages, so a burst of
+    emails costs one connect/STARTTLS/login instead of one per message.
+    Call close_if_idle() periodically; a connection the server has dropped
+    is reopened and the message resent once. Every socket operation gives up
+    after `timeout` seconds, so a hung server can't hold a message forever.
+    Not thread-safe: use one session per sending thread.
+    """
+
+    def __init__(self, mail, idle_timeout=30.0, timeout=30.0):
+        self.mail = mail
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._connection = None
+        self._last_used = 0.0
+        self.opened = 0
+
+    def _open(self):
+        # Same state lookup as Mail.connect()
+        app = getattr(self.mail, "app", None) or current_app
+        self._connection = _TimedConnection(app.extensions['mail'], self.timeout).__enter__()
+        self.opened += 1
+
+    def send(self, message):
+        """Send over the open connection (call inside an app context)"""
+        reused = self._connection is not None
+        if not reused:
+            self._open()
+        try:
+            self._connection.send(message)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Likely a stale connection the server timed out; retry on a new one
+            self.close()
+            if not reused:
+                raise
+            self._open()
+            self._connection.send(message)
+        except smtplib.SMTPException:
+            # Rejected message; smtplib has reset the session, keep it
+            raise
+        except Exception:
+            # E.g. a timeout: the server may be hung, so don't wait for QUIT
+            self._abort()
+            raise
+        self._last_used = time.monotonic()
+
+    def close_if_idle(self):
+        if self._connection is not None and time.monotonic() - self._last_used >= self.idle_timeout:
+            self.close()
+
+    def _abort(self):
+        connection, self._connection = self._connection, None
+        if connection is not None and connection.host is not None:
+            connection.host.close()
+
+    def close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.__exit__(None, None, None)
+            except Exception:
+                pass
+
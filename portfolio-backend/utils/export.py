@@ -0,0 +1,103 @@
+"""
+Streaming NDJSON/CSV export helpers
+"""
+
+import csv
+import io
+import zlib
+from datetime import datetime
+
+from bson import ObjectId
+from flask import Response, stream_with_context
+
+from utils.compression import negotiate
+from utils.json_provider import dumps
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+# Rows are accumulated into chunks of roughly this size before being yielded
+CHUNK_BYTES = 64 * 1024
+
+
+def _csv_line(values):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+
+def iter_export_rows(cursor, serialize, fmt, columns):
+    """Yield one encoded line per document, plus a header line for CSV"""
+    if fmt == "csv":
+        yield _csv_line(columns)
+        for doc in cursor:
+            row = serialize(doc)
+            yield _csv_line([_csv_value(row.get(column)) for column in columns])
+    else:
+        for doc in cursor:
+            yield dumps(serialize(doc)) + "\n"
+
+
+def iter_export_chunks(rows, compress=False):
+    """
+    Group encoded lines into ~64KB chunks, gzip-compressing on the fly
+    Only the current chunk is held in memory, whatever the export size.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    pending = []
+    pending_size = 0
+
+    for line in rows:
+        data = line.encode('utf-8')
+        pending.append(data)
+        pending_size += len(data)
+        if pending_size >= CHUNK_BYTES:
+            chunk = b"".join(pending)
+            pending, pending_size = [], 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+    chunk = b"".join(pending)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def export_response(cursor, serialize, fmt, columns, filename):
+    """
+    Build a streaming export response from a server-side cursor
+    Args:
+        cursor: pymongo cursor (use batch_size so documents arrive in batches)
+        serialize (callable): document -> dict
+        fmt (str): "ndjson" or "csv"
+        columns (list): CSV column order
+        filename (str): download name without extension
+    """
+    compress = negotiate(('gzip',)) == 'gzip'
+    rows = iter_export_rows(cursor, serialize, fmt, columns)
+    response = Response(
+        stream_with_context(iter_export_chunks(rows, compress)),
+        mimetype=EXPORT_FORMATS[fmt]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
@@ -0,0 +1,88 @@
+"""
+Sparse fieldsets (?fields=a,b) and named views (?view=summary) for list
+endpoints
+
+A model opts in with:
+    FIELDS   - output field -> document field ("id" -> "_id")
+    DEFAULTS - output field -> value when the document lacks the field
+    VIEWS    - view name -> tuple of output fields (None = full representation)
+The resolved fields drive both the Mongo projection and the serializer, so
+fields that aren't emitted are never read from the database.
+"""
+
+from functools import lru_cache
+
+from models.models import build_serializers
+
+
+def resolve_fields(model, args):
+    """
+    Output fields requested by ?fields= or ?view= (fields wins)
+    Returns:
+        tuple: output field names, or None for the full representation
+    Raises:
+        ValueError: unknown field or view
+    """
+    fields = args.get('fields')
+    if fields:
+        requested = tuple(dict.fromkeys(f.strip() for f in fields.split(',') if f.strip()))
+        unknown = [f for f in requested if f not in model.FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return requested or None
+
+    view = args.get('view')
+    if view:
+        if view not in model.VIEWS:
+            raise ValueError(f"view must be one of: {', '.join(model.VIEWS)}")
+        return model.VIEWS[view]
+    return None
+
+
+def fieldset_key(model, args):
+    """Canonical name of the requested representation, for cache keys and ETags"""
+    try:
+        fields = resolve_fields(model, args)
+    except ValueError:
+        return "invalid"
+    return "full" if fields is None else "+".join(sorted(fields))
+
+
+def projection(model, fields, required=()):
+    """
+    Mongo projection for the requested fields
+    Args:
+        required (tuple): output fields the endpoint itself needs (e.g. for
+            pagination cursors) even if the client didn't ask for them
+    """
+    if fields is None:
+        return model.PROJECTION
+    spec = {}
+    for field in (*fields, *required):
+        spec[model.FIELDS[field]] = 1
+    spec.setdefault("_id", 0)
+    return spec
+
+
+@lru_cache(maxsize=256)
+def _serializers(model, fields):
+    subset = {field: model.FIELDS[field] for field in fields}
+    if getattr(model, 'OMIT_MISSING', False):
+        return build_serializers(subset, omit_missing=True)
+    # Sparse fieldsets are lenient: a missing field serializes as its default or null
+    defaults = {field: model.DEFAULTS.get(field) for field in fields}
+    return build_serializers(subset, defaults)
+
+
+def serializer(model, fields):
+    """Document -> dict function for the requested fields"""
+    if fields is None:
+        return model.serialize
+    return _serializers(model, tuple(fields))[0]
+
+
+def many_serializer(model, fields):
+    """Documents -> list of dicts function for the requested fields"""
+    if fields is None:
+        return model.serialize_many
+    return _serializers(model, tuple(fields))[1]
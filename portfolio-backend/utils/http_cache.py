@@ -0,0 +1,227 @@
+"""
+HTTP-level caching for catalog endpoints: conditional GETs and encoded
+response bodies
+
+Each catalog collection (projects, skills) has a version stamp in the
+catalog_versions collection:
+    {_id: <name>, version: <int>, updated_at: <datetime>}
+Stamps are seeded at startup (seed_stamps) and every write bumps one via
+catalog_changed(). Read endpoints derive a strong ETag and Last-Modified from
+the stamp, which is cached alongside the data under the same tag, so a
+matching If-None-Match / If-Modified-Since is answered with 304 before the
+collection is queried or serialized.
+
+cached_response() goes one step further for full responses: it stores the
+final JSON bytes plus precompressed copies (gzip, and brotli when available)
+under a key that includes the stamp version, so a hit skips serialization,
+jsonify and compression entirely.
+"""
+
+import logging
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, make_response, request
+
+from config.config import Config
+from utils.cache import cache_manager
+from utils.compression import available_encodings, compress, negotiate
+from utils.database_optimized import db_manager
+
+logger = logging.getLogger(__name__)
+
+VERSION_COLLECTION = 'catalog_versions'
+
+# Response headers kept with a cached body
+CACHED_HEADERS = ('Content-Type',)
+
+
+def _now():
+    # HTTP dates have one-second resolution
+    return datetime.utcnow().replace(microsecond=0)
+
+
+def seed_stamps(names):
+    """Create missing version stamps, so reads never have to write"""
+    collection = db_manager.get_collection(VERSION_COLLECTION)
+    for name in names:
+        collection.update_one(
+            {"_id": name},
+            {"$setOnInsert": {"version": 1, "updated_at": _now()}},
+            upsert=True
+        )
+
+
+def _load_stamp(name):
+    doc = db_manager.get_collection(VERSION_COLLECTION).find_one({"_id": name})
+    if doc is None:
+        raise LookupError(f"no version stamp for {name}")
+    return {"version": doc["version"], "updated_at": doc["updated_at"]}
+
+
+def get_stamp(name):
+    """
+    Current version stamp for a catalog collection
+    Returns:
+        dict: {"version": int, "updated_at": datetime}
+    Raises:
+        LookupError: if the stamp has not been seeded
+    """
+    cache_key = f"catalog_version:{name}"
+    stamp = cache_manager.get(cache_key)
+    if stamp is not None:
+        return stamp
+
+    stamp = _load_stamp(name)
+    cache_manager.set(cache_key, stamp, Config.CATALOG_CACHE_TTL, tags=(name,))
+    # A write that bumped the stamp after our read may have invalidated the
+    # tag before our set; read again so an old stamp never outlives it
+    current = _load_stamp(name)
+    if current != stamp:
+        cache_manager.delete(cache_key)
+    return current
+
+
+def catalog_changed(name):
+    """
+    Record a write to a catalog collection: bump its version stamp and drop
+    every cached entry (data and stamp) under the tag of the same name
+    """
+    db_manager.get_collection(VERSION_COLLECTION).update_one(
+        {"_id": name},
+        {"$inc": {"version": 1}, "$set": {"updated_at": _now()}},
+        upsert=True
+    )
+    cache_manager.invalidate_tag(name)
+
+
+def _not_modified(etag, last_modified):
+    """
+    Returns:
+        str: the ETag to send with a 304 (the matched encoding variant),
+            or None if the client's copy is out of date
+    """
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+    if request.if_none_match:
+        for candidate in (etag, f"{etag}-gzip", f"{etag}-br"):
+            if request.if_none_match.contains(candidate):
+                return candidate
+        return None
+    if request.if_modified_since:
+        if last_modified.replace(tzinfo=timezone.utc) <= request.if_modified_since:
+            return etag
+    return None
+
+
+def conditional_get(name, variant=None):
+    """
+    Decorator adding ETag, Last-Modified and Cache-Control to a GET view and
+    answering conditional requests with 304 without calling it
+    Args:
+        name (str): catalog collection whose stamp versions the response
+        variant (callable): returns a string identifying the representation
+            (e.g. grouped vs flat), so each variant gets its own ETag
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                stamp = get_stamp(name)
+            except Exception as e:
+                logger.warning(f"Conditional GET: no version stamp for {name}: {e}")
+                return view(*args, **kwargs)
+
+            etag = f"{name}-{stamp['version']}"
+            if variant is not None:
+                etag = f"{etag}-{variant()}"
+
+            matched = _not_modified(etag, stamp["updated_at"])
+            if matched:
+                etag = matched
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                if response.headers.get('Content-Encoding') in ('gzip', 'br'):
+                    # Strong ETags must differ between encodings
+                    etag = f"{etag}-{response.headers['Content-Encoding']}"
+
+            response.set_etag(etag)
+            response.last_modified = stamp["updated_at"].replace(tzinfo=timezone.utc)
+            response.headers['Cache-Control'] = (
+                f"public, max-age={Config.CATALOG_HTTP_MAX_AGE}, must-revalidate"
+            )
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _cached_body_response(entry):
+    encoded = entry["encoded"]
+    encoding = negotiate(encoded) if encoded else None
+    if encoding is not None:
+        response = Response(encoded[encoding], headers=entry["headers"])
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = Response(entry["body"], headers=entry["headers"])
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def cached_response(name, params=None, variant=None, ttl_seconds=None):
+    """
+    Decorator caching a GET view's encoded 200 response under the tag `name`
+    Args:
+        name (str): cache tag; catalog_changed(name) drops the entries
+        params (dict): query parameter -> normalizer; only these parameters
+            are part of the cache key (others can't change the response)
+        variant (callable): returns an extra key component derived from the
+            request (e.g. a canonical sparse fieldset)
+        ttl_seconds (int): defaults to CATALOG_CACHE_TTL
+    """
+    params = params or {}
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            normalized = "&".join(
+                f"{param}={normalize(request.args.get(param))}"
+                for param, normalize in sorted(params.items())
+            )
+            if variant is not None:
+                normalized = f"{normalized}#{variant()}"
+            try:
+                version = get_stamp(name)["version"]
+            except Exception as e:
+                logger.warning(f"Response cache: no version stamp for {name}: {e}")
+                return view(*args, **kwargs)
+            # Versioned keys: a body rendered before a write can't be served after it
+            cache_key = f"response:{request.path}?{normalized}@{version}"
+
+            entry = cache_manager.get(cache_key)
+            if entry is not None:
+                return _cached_body_response(entry)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+
+            body = response.get_data()
+            encoded = {}
+            if Config.COMPRESSION_ENABLED and len(body) >= Config.COMPRESSION_MIN_SIZE:
+                encoded = {encoding: compress(body, encoding) for encoding in available_encodings()}
+            entry = {
+                "body": body,
+                "encoded": encoded,
+                "headers": {h: response.headers[h] for h in CACHED_HEADERS if h in response.headers}
+            }
+            cache_manager.set(cache_key, entry, ttl_seconds or Config.CATALOG_CACHE_TTL, tags=(name,))
+            return _cached_body_response(entry)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,94 @@
+"""
+HyperLogLog cardinality sketch for unique visitor estimates
+"""
+
+import hashlib
+import math
+
+DEFAULT_PRECISION = 12
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch with 2^precision registers and a 64-bit hash.
+
+    The relative standard error of count() is 1.04 / sqrt(2^precision):
+    about 1.6% at the default precision of 12 (4096 registers), so roughly
+    95% of estimates fall within +/-3.3% of the exact count. Small
+    cardinalities use linear counting and are close to exact.
+    """
+
+    def __init__(self, precision=DEFAULT_PRECISION, registers=None):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+
+    @staticmethod
+    def _hash(item):
+        if isinstance(item, str):
+            item = item.encode('utf-8')
+        return int.from_bytes(hashlib.blake2b(item, digest_size=8).digest(), 'big')
+
+    def register_for(self, item):
+        """Return the (register index, rank) pair an item would update"""
+        h = self._hash(item)
+        index = h >> (64 - self.precision)
+        remainder_bits = 64 - self.precision
+        remainder = h & ((1 << remainder_bits) - 1)
+        rank = remainder_bits - remainder.bit_length() + 1
+        return index, rank
+
+    def add(self, item):
+        """Add an item to the sketch"""
+        index, rank = self.register_for(item)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """Merge another sketch of the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        for i, value in enumerate(other.registers):
+            if value > self.registers[i]:
+                self.registers[i] = value
+
+    def count(self):
+        """Estimate the number of distinct items added"""
+        m = self.m
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_sparse(self):
+        """Non-zero registers as {"index": rank}, the shape stored in MongoDB"""
+        return {str(i): r for i, r in enumerate(self.registers) if r}
+
+    @classmethod
+    def from_sparse(cls, sparse, precision=DEFAULT_PRECISION):
+        """Rebuild a sketch from its stored sparse registers"""
+        sketch = cls(precision)
+        for index, rank in (sparse or {}).items():
+            sketch.registers[int(index)] = rank
+        return sketch
+
+
+def visitor_fingerprint(remote_addr, user_agent, secret):
+    """
+    Stable visitor identifier from client address and user agent
+
+    Keyed with a server secret: an unkeyed hash of "ip|user agent" can be
+    reversed by hashing every IPv4 address with a known user agent.
+    """
+    key = hashlib.blake2b(secret.encode('utf-8'), digest_size=32, person=b'visitor-id').digest()
+    raw = f"{remote_addr or ''}|{user_agent or ''}".encode('utf-8')
+    return hashlib.blake2b(raw, digest_size=8, key=key).hexdigest()
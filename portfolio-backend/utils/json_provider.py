@@ -0,0 +1,73 @@
+"""
+Fast JSON encoding for responses and exports
+
+Uses orjson when it is installed and falls back to the stdlib json module.
+Both encode datetime (ISO 8601, same as datetime.isoformat()) and
+bson.ObjectId (hex string) natively, so model serializers can return raw
+values and leave the conversion to the encoder.
+"""
+
+import json
+from datetime import date, datetime
+
+from bson import ObjectId
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj):
+        """Encode obj as UTF-8 JSON bytes"""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+
+    def dumps(obj):
+        """Encode obj as a JSON string"""
+        return dumps_bytes(obj).decode('utf-8')
+
+    loads = orjson.loads
+else:
+    def dumps_bytes(obj):
+        """Encode obj as UTF-8 JSON bytes"""
+        return dumps(obj).encode('utf-8')
+
+    def dumps(obj):
+        """Encode obj as a JSON string"""
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':'))
+
+    loads = json.loads
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider backed by dumps_bytes()/loads()"""
+
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Callers asking for specific json.dumps options get the stdlib
+            kwargs.setdefault("default", _default)
+            return json.dumps(obj, **kwargs)
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
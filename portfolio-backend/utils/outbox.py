@@ -0,0 +1,357 @@
+"""
+Durable outbox for outgoing email
+
+Requests only insert outbox documents; a pool of background threads in each
+worker claims and delivers them:
+
+    {
+        kind, subject, recipients, body,
+        status: "pending" | "sending" | "sent" | "dead" | "held" | "digested",
+        attempts, next_attempt_at, lease_until, last_error,
+        created_at, sent_at, digest_id
+    }
+
+A message is claimed atomically with find_one_and_update, which sets a lease.
+If the worker dies mid-send the lease expires and another worker retries it.
+Failures are retried with exponential backoff (plus jitter) until
+max_attempts, after which the message is parked as "dead" for inspection.
+
+Each delivery thread keeps one SMTP connection open across messages and
+closes it after smtp_idle_timeout seconds without mail. SMTP socket
+operations time out after smtp_timeout seconds (at most a quarter of the
+lease), so a hung server fails the attempt before the lease can be taken
+over.
+
+With digest_minutes set, admin notifications are stored as "held". Once the
+oldest has waited digest_minutes, every held notification is folded into a
+single digest email, so the owner gets at most one notification per period.
+Notifications digested by a worker that died before queueing the digest go
+back to "held" after lease_seconds.
+"""
+
+import atexit
+import logging
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from config.config import Config
+from utils.database_optimized import db_manager
+from utils.email import SMTPSession, build_admin_digest, to_message
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_COLLECTION = 'outbox'
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+DEAD = "dead"
+HELD = "held"
+DIGESTED = "digested"
+
+
+class EmailOutbox:
+    """Outbox collection plus the per-worker delivery thread pool"""
+
+    def __init__(self, collection_name=OUTBOX_COLLECTION, workers=2, max_attempts=8,
+                 backoff_base=30.0, backoff_max=3600.0, lease_seconds=120.0, poll_interval=5.0,
+                 smtp_idle_timeout=30.0, smtp_timeout=30.0, digest_minutes=0):
+        self.collection_name = collection_name
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.smtp_idle_timeout = smtp_idle_timeout
+        # A send still running when the lease expires would be sent twice;
+        # one send can wait on several socket operations
+        self.smtp_timeout = min(smtp_timeout, lease_seconds / 4)
+        self.digest_minutes = digest_minutes
+
+        self.app = None
+        self.mail = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"enqueued": 0, "sent": 0, "retried": 0, "dead": 0, "digests": 0}
+
+    def _incr(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    @property
+    def collection(self):
+        return db_manager.get_collection(self.collection_name)
+
+    def init_app(self, app, mail):
+        """Bind the app (for app_context) and Flask-Mail, and start delivering"""
+        self.app = app
+        self.mail = mail
+        self._ensure_started()
+
+    def _ensure_started(self):
+        """Start the delivery threads, restarting them in forked worker processes"""
+        if self.app is None or (self._threads and self._pid == os.getpid()):
+            return
+
+        with self._start_lock:
+            if self._threads and self._pid == os.getpid():
+                return
+            # Threads do not survive fork(); start clean in the child
+            self._wakeup = threading.Event()
+            self._stop = threading.Event()
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"email-outbox-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    # Enqueueing
+
+    def enqueue(self, emails, **fields):
+        """
+        Persist emails for background delivery
+        Args:
+            emails (list): dicts with subject/recipients/body (see utils.email)
+            **fields: extra fields stored on every document (e.g. contact_id)
+        Returns:
+            list: inserted outbox ids
+        """
+        now = datetime.utcnow()
+        docs = [
+            {
+                **email,
+                **fields,
+                "status": HELD if self.digest_minutes and email.get("digestible") else PENDING,
+                "attempts": 0,
+                "next_attempt_at": now,
+                "lease_until": None,
+                "last_error": None,
+                "created_at": now
+            }
+            for email in emails
+        ]
+        result = self.collection.insert_many(docs)
+        self._incr("enqueued", len(docs))
+        self._ensure_started()
+        self._wakeup.set()
+        return result.inserted_ids
+
+    # Delivery
+
+    def claim(self):
+        """Atomically lease the next due message, or return None"""
+        now = datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": PENDING, "next_attempt_at": {"$lte": now}},
+                    # Lease expired: the worker sending it died
+                    {"status": SENDING, "lease_until": {"$lte": now}}
+                ]
+            },
+            {
+                "$set": {"status": SENDING, "lease_until": now + timedelta(seconds=self.lease_seconds)},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def backoff(self, attempts):
+        """Seconds to wait before the next attempt (exponential, with jitter)"""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    def mark_sent(self, doc):
+        self.collection.update_one(
+            {"_id": doc["_id"], "status": SENDING},
+            {"$set": {"status": SENT, "sent_at": datetime.utcnow(), "lease_until": None}}
+        )
+        self._incr("sent")
+
+    def mark_failed(self, doc, error):
+        """Schedule a retry, or park the message as dead after max_attempts"""
+        if doc["attempts"] >= self.max_attempts:
+            update = {"status": DEAD, "lease_until": None, "last_error": str(error)}
+            self._incr("dead")
+            logger.error(f"Outbox: giving up on {doc['_id']} after {doc['attempts']} attempts: {error}")
+        else:
+            update = {
+                "status": PENDING,
+                "lease_until": None,
+                "last_error": str(error),
+                "next_attempt_at": datetime.utcnow() + timedelta(seconds=self.backoff(doc["attempts"]))
+            }
+            self._incr("retried")
+            logger.warning(f"Outbox: attempt {doc['attempts']} for {doc['_id']} failed, will retry: {error}")
+        self.collection.update_one({"_id": doc["_id"], "status": SENDING}, {"$set": update})
+
+    def deliver(self, doc, session=None):
+        """
+        Send one claimed message, over session's connection if given
+        Raises:
+            Exception: the send error, once the app context has closed (a
+            failed delivery is retried, not an app error to log at teardown)
+        """
+        error = None
+        with self.app.app_context():
+            try:
+                if session is None:
+                    session = SMTPSession(self.mail, timeout=self.smtp_timeout)
+                    try:
+                        session.send(to_message(doc))
+                    finally:
+                        session.close()
+                else:
+                    session.send(to_message(doc))
+            except Exception as e:
+                error = e
+        if error is not None:
+            raise error
+
+    def process_one(self, session=None):
+        """
+        Claim and deliver a single message
+        Returns:
+            bool: False if nothing was due
+        """
+        doc = self.claim()
+        if doc is None:
+            return False
+        try:
+            self.deliver(doc, session)
+        except Exception as e:
+            self.mark_failed(doc, e)
+        else:
+            self.mark_sent(doc)
+        return True
+
+    # Admin digest
+
+    def flush_digest(self):
+        """
+        Fold held notifications into one digest email once the oldest is due
+        Returns:
+            ObjectId: the queued digest's id, or None
+        """
+        if not self.digest_minutes:
+            return None
+        now = datetime.utcnow()
+        self._reclaim_orphaned_digests(now)
+        oldest = self.collection.find_one({"status": HELD}, {"created_at": 1}, sort=[("created_at", 1)])
+        if oldest is None or oldest["created_at"] > now - timedelta(minutes=self.digest_minutes):
+            return None
+
+        # update_many moves each held document at most once, so concurrent
+        # flushes in other workers never digest the same notification twice
+        digest_id = ObjectId()
+        self.collection.update_many(
+            {"status": HELD, "created_at": {"$lte": now}},
+            {"$set": {"status": DIGESTED, "digest_id": digest_id, "digested_at": now}}
+        )
+        notifications = list(self.collection.find({"digest_id": digest_id}, sort=[("created_at", 1)]))
+        if not notifications:
+            return None
+
+        self.collection.insert_one({
+            **build_admin_digest(notifications),
+            "_id": digest_id,
+            "status": PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "lease_until": None,
+            "last_error": None,
+            "created_at": now
+        })
+        self._incr("digests")
+        return digest_id
+
+    def _reclaim_orphaned_digests(self, now):
+        """
+        Return notifications to "held" if the worker that digested them died
+        before queueing the digest email (no outbox document with digest_id)
+        """
+        cutoff = now - timedelta(seconds=self.lease_seconds)
+        digest_ids = self.collection.distinct(
+            "digest_id", {"status": DIGESTED, "digested_at": {"$lte": cutoff}}
+        )
+        if not digest_ids:
+            return
+        queued = {doc["_id"] for doc in self.collection.find({"_id": {"$in": digest_ids}}, {"_id": 1})}
+        orphaned = [digest_id for digest_id in digest_ids if digest_id not in queued]
+        if orphaned:
+            result = self.collection.update_many(
+                {"status": DIGESTED, "digest_id": {"$in": orphaned}},
+                {"$set": {"status": HELD}, "$unset": {"digest_id": "", "digested_at": ""}}
+            )
+            logger.warning(f"Outbox: re-holding {result.modified_count} notifications from unsent digests")
+
+    def _run(self):
+        session = SMTPSession(self.mail, self.smtp_idle_timeout, self.smtp_timeout)
+        try:
+            while not self._stop.is_set():
+                self._wakeup.clear()
+                try:
+                    if self.process_one(session):
+                        continue
+                    if self.flush_digest():
+                        continue
+                except Exception as e:
+                    logger.error(f"Outbox: delivery loop error: {e}")
+                # Idle: drop a quiet SMTP connection, then sleep until new
+                # mail is enqueued or the next poll
+                session.close_if_idle()
+                self._wakeup.wait(self.poll_interval)
+        finally:
+            session.close()
+
+    def shutdown(self, timeout=5.0):
+        """Stop the delivery threads (leased messages are retried elsewhere)"""
+        if not self._threads or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self):
+        """Delivery counters for this worker plus outbox backlog"""
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        try:
+            snapshot["pending"] = self.collection.count_documents({"status": {"$in": [PENDING, SENDING]}})
+            snapshot["dead_total"] = self.collection.count_documents({"status": DEAD})
+            if self.digest_minutes:
+                snapshot["held"] = self.collection.count_documents({"status": HELD})
+        except Exception as e:
+            logger.warning(f"Outbox: could not count backlog: {e}")
+        return snapshot
+
+
+email_outbox = EmailOutbox(
+    workers=Config.OUTBOX_WORKERS,
+    max_attempts=Config.OUTBOX_MAX_ATTEMPTS,
+    backoff_base=Config.OUTBOX_BACKOFF_BASE,
+    backoff_max=Config.OUTBOX_BACKOFF_MAX,
+    lease_seconds=Config.OUTBOX_LEASE_SECONDS,
+    poll_interval=Config.OUTBOX_POLL_INTERVAL,
+    smtp_idle_timeout=Config.SMTP_IDLE_TIMEOUT,
+    smtp_timeout=Config.SMTP_TIMEOUT,
+    digest_minutes=Config.ADMIN_DIGEST_MINUTES
+)
+
+# Stop delivery threads on worker shutdown
+atexit.register(email_outbox.shutdown)
@@ -0,0 +1,83 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+def parse_limit(value, default=50, maximum=200):
+    """
+    Parse a page size from the query string, clamped to [1, maximum]
+    Raises:
+        ValueError: if the value is not an integer
+    """
+    if value in (None, ''):
+        return default
+    return max(1, min(int(value), maximum))
+
+
+def parse_datetime(value):
+    """
+    Parse an ISO-8601 query parameter into a naive UTC datetime
+    Raises:
+        ValueError: if the value is not a valid timestamp
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = (parsed - parsed.utcoffset()).replace(tzinfo=None)
+    return parsed
+
+
+def encode_cursor(sort_value, object_id):
+    """Opaque cursor for the position after a (datetime, _id) pair"""
+    payload = json.dumps({"t": sort_value.isoformat(), "id": str(object_id)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a cursor produced by encode_cursor
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_filter(field, token):
+    """
+    Filter selecting documents strictly after the cursor position when
+    sorted by (field, _id) descending
+    """
+    sort_value, object_id = decode_cursor(token)
+    return {"$or": [
+        {field: {"$lt": sort_value}},
+        {field: sort_value, "_id": {"$lt": object_id}}
+    ]}
+
+
+def keyset_page(cursor, field, limit):
+    """
+    Materialize one page from a cursor sorted by (field, _id) descending and
+    limited to limit + 1
+    Returns:
+        tuple: (documents, next_cursor or None)
+    """
+    documents = list(cursor)
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        last = documents[-1]
+        next_cursor = encode_cursor(last[field], last["_id"])
+    return documents, next_cursor
@@ -0,0 +1,94 @@
+"""
+Adaptive sampling for analytics ingest under load
+"""
+
+import random
+import threading
+import time
+
+from config.config import Config
+
+
+class AdaptiveSampler:
+    """
+    Keeps every event under normal load and switches to probabilistic
+    sampling when this worker's ingest rate or the observed DB write latency
+    crosses its threshold.
+
+    Kept events carry weight = 1 / sampling rate, so weighted sums remain
+    unbiased estimates of the true counts.
+    """
+
+    def __init__(self, enabled=True, max_events_per_second=50.0, max_latency_ms=250.0,
+                 min_rate=0.01, window_seconds=5.0):
+        self.enabled = enabled
+        self.max_events_per_second = max_events_per_second
+        self.max_latency_ms = max_latency_ms
+        self.min_rate = min_rate
+        self.window_seconds = window_seconds
+
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._ingest_rate = 0.0
+        self._latency_ms = 0.0
+        self._rate = 1.0
+
+    def observe_latency(self, latency_ms):
+        """Feed a DB write latency sample (exponentially weighted)"""
+        with self._lock:
+            self._latency_ms = latency_ms if not self._latency_ms else \
+                0.8 * self._latency_ms + 0.2 * latency_ms
+
+    def _recompute(self, now):
+        elapsed = now - self._window_start
+        if elapsed < self.window_seconds:
+            return
+        self._ingest_rate = self._window_count / elapsed
+        self._window_start = now
+        self._window_count = 0
+
+        rate = 1.0
+        if self._ingest_rate > self.max_events_per_second:
+            rate = min(rate, self.max_events_per_second / self._ingest_rate)
+        if self._latency_ms > self.max_latency_ms:
+            rate = min(rate, self.max_latency_ms / self._latency_ms)
+        self._rate = max(self.min_rate, rate)
+
+    def sample(self):
+        """
+        Decide whether to keep an incoming event
+        Returns:
+            float: the weight to store on the kept event, or None to skip it
+        """
+        if not self.enabled:
+            return 1.0
+        with self._lock:
+            self._window_count += 1
+            self._recompute(time.monotonic())
+            rate = self._rate
+        if rate >= 1.0:
+            return 1.0
+        return 1.0 / rate if random.random() < rate else None
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def stats(self):
+        """Current sampling state for /health"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "rate": round(self._rate, 4),
+                "ingest_rate": round(self._ingest_rate, 2),
+                "db_latency_ms": round(self._latency_ms, 2)
+            }
+
+
+analytics_sampler = AdaptiveSampler(
+    enabled=Config.ANALYTICS_SAMPLING_ENABLED,
+    max_events_per_second=Config.ANALYTICS_SAMPLING_MAX_EVENTS_PER_SECOND,
+    max_latency_ms=Config.ANALYTICS_SAMPLING_MAX_LATENCY_MS,
+    min_rate=Config.ANALYTICS_SAMPLING_MIN_RATE
+)
@@ -0,0 +1,257 @@
+"""
+Append-only on-disk spool for analytics events
+
+Each worker appends to its own segment file
+    <directory>/segment-<time_ns>-<pid>.open
+as a sequence of records
+    [4-byte big-endian length][4-byte CRC32][BSON document]
+Segments are renamed to .log when closed (rotation or shutdown). A replayer
+claims a .log segment by renaming it to .replaying-<pid>, writes its records
+back to MongoDB and deletes it. A torn record at the end of a segment (crash
+mid-write) is detected by length/CRC and skipped.
+
+The writer and the replayer hold an exclusive flock on the segment for as
+long as they own it. The kernel drops the lock when the process dies, so an
+.open or .replaying segment whose lock can be taken is an orphan and goes
+back to .log on the next scan. PIDs are only used to keep names unique: they
+are reused after a container restart and say nothing about ownership.
+"""
+
+import errno
+import fcntl
+import glob
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+
+import bson
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('>II')
+
+
+def _try_lock(path):
+    """
+    Open path and take an exclusive flock without blocking
+    Returns:
+        int: the locked file descriptor, or None if another process owns the
+        file or it has been renamed away
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        # The path may have been renamed by its owner before we locked it
+        if os.fstat(fd).st_ino != os.stat(path).st_ino:
+            raise FileNotFoundError(path)
+    except (BlockingIOError, FileNotFoundError):
+        os.close(fd)
+        return None
+    except OSError as e:
+        os.close(fd)
+        if e.errno in (errno.EAGAIN, errno.EACCES):
+            return None
+        raise
+    return fd
+
+
+class DiskSpool:
+    """Length-prefixed, CRC-checked segment files with batched fsync"""
+
+    def __init__(self, directory, segment_max_bytes=16 * 1024 * 1024, fsync_interval=1.0):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.Lock()
+        self._fd = None
+        self._claims = {}
+        self._path = None
+        self._pid = None
+        self._size = 0
+        self._dirty = False
+        self._last_sync = time.monotonic()
+        self._sync_timer = None
+
+    # Writing
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._pid = os.getpid()
+        name = f"segment-{time.time_ns()}-{self._pid}"
+        # Lock under a name recovery doesn't scan, then publish it as .open
+        staging = os.path.join(self.directory, f".{name}.tmp")
+        self._fd = os.open(staging, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        self._path = os.path.join(self.directory, f"{name}.open")
+        os.rename(staging, self._path)
+        self._size = 0
+
+    def _close_segment(self):
+        if self._fd is None:
+            return
+        os.fsync(self._fd)
+        # Rename while still holding the lock so recovery never races us
+        if self._size:
+            os.rename(self._path, self._path[:-len('.open')] + '.log')
+        else:
+            os.remove(self._path)
+        os.close(self._fd)
+        self._fd = None
+        self._path = None
+        self._dirty = False
+
+    def _write(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self._fd, view):]
+
+    def append(self, docs):
+        """
+        Append documents
+        fsync happens at most every fsync_interval seconds, and no later than
+        fsync_interval after the first unsynced write.
+        """
+        with self._lock:
+            if self._fd is not None and self._pid != os.getpid():
+                # Inherited across fork: close our copy (releasing our share of
+                # the lock) and leave the parent's segment alone
+                os.close(self._fd)
+                self._fd = None
+            if self._fd is None:
+                self._open_segment()
+
+            data = bytearray()
+            for doc in docs:
+                payload = bson.encode(doc)
+                data += HEADER.pack(len(payload), zlib.crc32(payload))
+                data += payload
+            self._write(data)
+            self._size += len(data)
+            self._dirty = True
+
+            if self._size >= self.segment_max_bytes:
+                self._close_segment()
+                return
+            elapsed = time.monotonic() - self._last_sync
+            if elapsed >= self.fsync_interval:
+                self._sync_locked()
+            elif self._sync_timer is None or not self._sync_timer.is_alive():
+                # A timer thread does not survive fork, so a child starts its own
+                self._sync_timer = threading.Timer(self.fsync_interval - elapsed, self.sync)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+
+    def _sync_locked(self):
+        if self._fd is not None and self._dirty:
+            os.fsync(self._fd)
+            self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        """Flush and fsync the active segment if it has unsynced records"""
+        with self._lock:
+            if self._pid == os.getpid():
+                self._sync_locked()
+
+    def rotate(self):
+        """Close the active segment so it becomes eligible for replay"""
+        with self._lock:
+            if self._pid == os.getpid():
+                self._close_segment()
+
+    close = rotate
+
+    # Replaying
+
+    def _recover_orphans(self):
+        """Release segments whose writer or replayer no longer holds their lock"""
+        for path in glob.glob(os.path.join(self.directory, '.segment-*.tmp')):
+            fd = _try_lock(path)
+            if fd is not None:
+                # Writer died before publishing the segment; it holds no records
+                os.remove(path)
+                os.close(fd)
+        for path in glob.glob(os.path.join(self.directory, 'segment-*.open')):
+            fd = _try_lock(path)
+            if fd is not None:
+                os.rename(path, path[:-len('.open')] + '.log')
+                os.close(fd)
+        for path in glob.glob(os.path.join(self.directory, 'segment-*.replaying-*')):
+            if path in self._claims:
+                continue
+            fd = _try_lock(path)
+            if fd is not None:
+                os.rename(path, path.split('.replaying-')[0] + '.log')
+                os.close(fd)
+
+    def claim_segments(self):
+        """Claim closed segments for replay, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        self._recover_orphans()
+        claimed = []
+        for path in sorted(glob.glob(os.path.join(self.directory, 'segment-*.log'))):
+            target = path[:-len('.log')] + f'.replaying-{os.getpid()}'
+            try:
+                os.rename(path, target)
+            except FileNotFoundError:
+                continue  # claimed by another worker
+            fd = _try_lock(target)
+            if fd is None:
+                continue  # recovered by another worker before we locked it
+            self._claims[target] = fd
+            claimed.append(target)
+        return claimed
+
+    def _unlock_claim(self, path):
+        fd = self._claims.pop(path, None)
+        if fd is not None:
+            os.close(fd)
+
+    def release(self, path):
+        """Return a claimed segment to the queue after a failed replay"""
+        try:
+            os.rename(path, path.split('.replaying-')[0] + '.log')
+        finally:
+            self._unlock_claim(path)
+
+    def finish(self, path):
+        """Delete a claimed segment once it has been replayed"""
+        try:
+            os.remove(path)
+        finally:
+            self._unlock_claim(path)
+
+    @staticmethod
+    def read_segment(path, chunk_size=1000):
+        """Yield lists of up to chunk_size documents from a segment"""
+        chunk = []
+        with open(path, 'rb') as f:
+            while True:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    break
+                length, crc = HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    logger.warning(f"Spool: torn record at end of {path}, skipping remainder")
+                    break
+                chunk.append(bson.decode(payload))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def pending_segments(self):
+        """Number of segment files waiting to be replayed (all workers)"""
+        if not os.path.isdir(self.directory):
+            return 0
+        return len(glob.glob(os.path.join(self.directory, 'segment-*')))